@@ -0,0 +1,68 @@
+import threading
+import time
+
+DEBOUNCE = 2.0     # Seconds of quiet after the last change before saving
+MAX_DELAY = 10.0   # Upper bound on how long a continuous burst can postpone the save
+
+
+class Autosaver:
+    """Debounced background saver.
+
+    notify() after every change; bursts are coalesced and save() runs once on a timer thread
+    after DEBOUNCE seconds of quiet (or MAX_DELAY after the first change at the latest).
+    """
+
+    def __init__(self, save, delay=DEBOUNCE, max_delay=MAX_DELAY):
+        self._save = save
+        self.delay = delay
+        self.max_delay = max_delay
+        self._timer = None
+        self._first_change = None
+        self._lock = threading.Lock()
+        self._run_lock = threading.Lock()  # one save at a time
+        self.last_error = None
+
+    def notify(self):
+        with self._lock:
+            now = time.monotonic()
+            if self._first_change is None:
+                self._first_change = now
+            wait = min(self.delay, self._first_change + self.max_delay - now)
+            self._schedule(max(wait, 0))
+
+    def save_soon(self):
+        # Save in the background right away (e.g. the 'save' command in the GUI)
+        with self._lock:
+            self._schedule(0)
+
+    def flush(self):
+        # Save synchronously now (e.g. on exit)
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            self._first_change = None
+        self._run()
+
+    def _schedule(self, wait):
+        if self._timer is not None:
+            self._timer.cancel()
+        self._timer = threading.Timer(wait, self._fire)
+        self._timer.daemon = True
+        self._timer.start()
+
+    def _fire(self):
+        with self._lock:
+            self._timer = None
+            self._first_change = None
+        self._run()
+
+    def _run(self):
+        with self._run_lock:
+            try:
+                self._save()
+                self.last_error = None
+            except Exception as e:
+                # State stays dirty; try again after the next debounce window
+                self.last_error = e
+                self.notify()
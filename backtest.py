@@ -0,0 +1,246 @@
+"""Historical backtests with the paper account's trading rules, vectorized across tickers.
+
+Orders are dollar amounts per bar and ticker, the same buy/sell/sellall/short/cover orders the
+account takes (see papertrading.trade_rules), filled at that bar's price. They come either from
+signal matrices (one T x N array or DataFrame per op, 0/NaN for no order, truthy for sellall) or
+from a strategy callback that is shown the prices up to the current bar and returns that bar's
+orders. Each bar applies sellall, sell, cover, buy and short in that order, every op as one set
+of array operations over all tickers, so the Python loop runs once per bar rather than once per
+trade.
+
+    python backtest.py --tickers AAPL,MSFT,NVDA --period 10y --fast 20 --slow 100
+"""
+import argparse
+import sys
+import time
+from collections import namedtuple
+
+from lazy import lazy_import
+from storage import STARTING_CASH
+
+np = lazy_import('numpy')
+pd = lazy_import('pandas')
+
+OPS = ('sellall', 'sell', 'cover', 'buy', 'short')  # Order of application within a bar; exits free cash first
+
+# equity: DataFrame indexed like prices with cash, market_value (signed, shorts negative), equity
+# and realized_pl. trades: one row per fill. qty/cost: final positions as Series by ticker.
+BacktestResult = namedtuple('BacktestResult', ['equity', 'trades', 'qty', 'cost', 'cash', 'realized_pl'])
+
+
+def load_closes(tickers, period='1y', interval='1d', store=None):
+    """Close prices as a DataFrame (bars x tickers) from the bar store, NaN where a ticker has no bar."""
+    from barstore import get_bar_store
+    store = store or get_bar_store()
+    closes = {}
+    for ticker in tickers:
+        hist = store.history(ticker, period=period, interval=interval)
+        if not hist.empty:
+            closes[ticker] = hist['Close']
+    return pd.DataFrame(closes).sort_index()
+
+
+def run(prices, orders=None, strategy=None, cash=STARTING_CASH):
+    """Backtest orders against prices (DataFrame, bars x tickers; NaN = no price that bar).
+
+    orders maps op -> T x N amounts aligned with prices. strategy(i, history, qty, cash) is
+    called for every bar with history = prices[:i + 1] as an array and the current positions
+    and cash, and returns {op: length-N amounts} (or None) for bar i. Both may be given.
+
+    Orders fill at bar i's price, so signals built from that same bar should be shifted by one
+    to avoid look-ahead. A rejected order (no price, no position, not enough cash or shares) is
+    skipped like the account would refuse it; buys in one bar are funded in ticker order.
+    """
+    index, tickers = prices.index, [t for t in prices.columns]
+    px = prices.to_numpy(dtype=float)
+    n_bars, n = px.shape
+    signals = {}
+    for op, matrix in (orders or {}).items():
+        if op not in OPS:
+            raise ValueError(f"Unknown order type {op}")
+        matrix = matrix.reindex(index=index, columns=tickers) if isinstance(matrix, pd.DataFrame) else matrix
+        matrix = np.nan_to_num(np.asarray(matrix, dtype=float))
+        if matrix.shape != px.shape:
+            raise ValueError(f"{op} orders are {matrix.shape}, prices are {px.shape}")
+        signals[op] = matrix
+    # Last known price per ticker for marking positions to market
+    marks = pd.DataFrame(px).ffill().to_numpy()
+
+    qty = np.zeros(n)
+    cost = np.zeros(n)
+    realized = 0.0
+    equity = np.empty((n_bars, 4))
+    fills = []  # per-op arrays of (bar, ticker index, op, price, amount, shares, realized)
+
+    for i in range(n_bars):
+        p = px[i]
+        bar = {op: matrix[i] for op, matrix in signals.items()}
+        if strategy is not None:
+            extra = strategy(i, px[:i + 1], qty.copy(), cash) or {}
+            for op, amounts in extra.items():
+                if op not in OPS:
+                    raise ValueError(f"Unknown order type {op}")
+                amounts = np.nan_to_num(np.asarray(amounts, dtype=float))
+                bar[op] = bar[op] + amounts if op in bar else amounts
+        for op in OPS:
+            amounts = bar.get(op)
+            if amounts is None or not amounts.any():
+                continue
+            qty, cost, cash, done = _apply(op, amounts, p, qty, cost, cash)
+            if done is not None:
+                mask, amount, shares, pl = done
+                realized += pl.sum()
+                where = np.flatnonzero(mask)
+                fills.append((np.full(len(where), i), where, op, p[where], amount[where], shares[where], pl[where]))
+        market = np.nansum(qty * marks[i])
+        equity[i] = (cash, market, cash + market, realized)
+
+    return BacktestResult(
+        equity=pd.DataFrame(equity, index=index, columns=['cash', 'market_value', 'equity', 'realized_pl']),
+        trades=_trade_list(fills, index, tickers),
+        qty=pd.Series(qty, index=tickers),
+        cost=pd.Series(cost, index=tickers),
+        cash=cash,
+        realized_pl=realized,
+    )
+
+
+def _apply(op, amounts, p, qty, cost, cash):
+    # One op for every ticker at once, mirroring papertrading.trade_rules. Returns the new
+    # qty, cost and cash plus (filled mask, amount, signed shares, realized P/L), or None if
+    # nothing filled.
+    priced = ~np.isnan(p)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        if op == 'sellall':
+            mask = (amounts != 0) & priced & (qty != 0)
+            amount = np.where(mask, p * qty, 0.0)
+            shares = np.where(mask, -qty, 0.0)
+            pl = np.where(mask, (p - cost) * qty, 0.0)
+            new_qty = np.where(mask, 0.0, qty)
+            new_cost = np.where(mask, 0.0, cost)
+            cash += amount.sum()
+        elif op == 'sell':
+            held = p * qty
+            mask = (amounts > 0) & priced & (qty != 0) & (amounts <= held)
+            full = mask & (amounts == held)
+            amount = np.where(mask, amounts, 0.0)
+            sold = np.where(full, qty, amount / p)
+            shares = np.where(mask, -sold, 0.0)
+            pl = np.where(mask, (p - cost) * sold, 0.0)
+            new_qty = np.where(full, 0.0, np.where(mask, qty - sold, qty))
+            new_cost = np.where(full, 0.0, cost)
+            cash += amount.sum()
+        elif op == 'cover':
+            bought = amounts / p
+            mask = (amounts > 0) & priced & (qty < 0) & (np.abs(qty) >= bought)
+            full = mask & (np.abs(qty) == bought)
+            amount = np.where(mask, amounts, 0.0)
+            covered = np.where(full, np.abs(qty), bought)
+            shares = np.where(mask, covered, 0.0)
+            pl = np.where(mask, (cost - p) * covered, 0.0)
+            new_qty = np.where(full, 0.0, np.where(mask, qty + covered, qty))
+            new_cost = np.where(full, 0.0, cost)
+            cash -= amount.sum()
+        elif op == 'buy':
+            mask = (amounts > 0) & priced
+            mask &= _funded(np.where(mask, amounts, 0.0), cash)
+            amount = np.where(mask, amounts, 0.0)
+            shares = np.where(mask, amount / p, 0.0)
+            new_qty = qty + shares
+            averaged = np.where(qty != 0, (qty * cost + shares * p) / new_qty, p)
+            new_cost = np.where(mask, np.where(new_qty == 0, 0.0, averaged), cost)
+            new_qty = np.where(mask & (new_qty == 0), 0.0, new_qty)
+            pl = np.zeros(len(qty))
+            cash -= amount.sum()
+        else:  # short
+            mask = (amounts > 0) & priced & (qty <= 0)
+            amount = np.where(mask, amounts, 0.0)
+            shorted = np.where(mask, amount / p, 0.0)
+            shares = -shorted
+            averaged = (np.abs(qty) * cost + shorted * p) / (np.abs(qty) + shorted)
+            new_qty = qty - shorted
+            new_cost = np.where(mask, np.where(qty != 0, averaged, p), cost)
+            pl = np.zeros(len(qty))
+            cash += amount.sum()
+    if not mask.any():
+        return qty, cost, cash, None
+    return new_qty, new_cost, cash, (mask, amount, shares, pl)
+
+
+def _funded(amounts, cash):
+    # Which buys the account would accept placed one after another in ticker order: each needs
+    # the cash left after the ones before it. Usually everything fits and this is one sum.
+    if amounts.sum() <= cash:
+        return np.ones(len(amounts), dtype=bool)
+    funded = np.zeros(len(amounts), dtype=bool)
+    for j in np.flatnonzero(amounts):
+        if amounts[j] <= cash:
+            funded[j] = True
+            cash -= amounts[j]
+    return funded
+
+
+def _trade_list(fills, index, tickers):
+    columns = ['time', 'ticker', 'op', 'price', 'amount', 'shares', 'realized_pl']
+    if not fills:
+        return pd.DataFrame(columns=columns)
+    bars = np.concatenate([f[0] for f in fills])
+    where = np.concatenate([f[1] for f in fills])
+    trades = pd.DataFrame({
+        'time': index[bars],
+        'ticker': np.asarray(tickers, dtype=object)[where],
+        'op': np.concatenate([np.full(len(f[1]), f[2], dtype=object) for f in fills]),
+        'price': np.concatenate([f[3] for f in fills]),
+        'amount': np.concatenate([f[4] for f in fills]),
+        'shares': np.concatenate([f[5] for f in fills]),
+        'realized_pl': np.concatenate([f[6] for f in fills]),
+    }, columns=columns)
+    return trades
+
+
+def crossover_orders(closes, fast=20, slow=100, amount=10_000):
+    """Example signal matrices: buy `amount` when the fast moving average crosses above the slow
+    one and sell everything when it crosses back, acting on the bar after the cross."""
+    above = closes.rolling(fast).mean() > closes.rolling(slow).mean()
+    was_above = above.shift(1, fill_value=False)
+    crossed_up = (above & ~was_above).shift(1, fill_value=False)
+    crossed_down = (~above & was_above).shift(1, fill_value=False)
+    return {'buy': crossed_up * float(amount), 'sellall': crossed_down.astype(float)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Moving-average crossover backtest on cached bars')
+    parser.add_argument('--tickers', required=True, help='comma-separated tickers')
+    parser.add_argument('--period', default='10y')
+    parser.add_argument('--interval', default='1d', choices=('1d', '1m'))
+    parser.add_argument('--fast', type=int, default=20)
+    parser.add_argument('--slow', type=int, default=100)
+    parser.add_argument('--amount', type=float, default=10_000, help='dollars per buy')
+    parser.add_argument('--cash', type=float, default=STARTING_CASH)
+    parser.add_argument('--trades', help='write the trade list to this CSV')
+    parser.add_argument('--equity', help='write the equity curve to this CSV')
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    closes = load_closes([t.strip().upper() for t in args.tickers.split(',') if t.strip()], args.period, args.interval)
+    if closes.empty:
+        parser.error('no bars found')
+    loaded = time.perf_counter()
+    result = run(closes, crossover_orders(closes, args.fast, args.slow, args.amount), cash=args.cash)
+    done = time.perf_counter()
+
+    equity = result.equity['equity']
+    print(f"{len(closes)} bars x {len(closes.columns)} tickers, {len(result.trades)} trades "
+          f"(load {loaded - start:.2f}s, backtest {done - loaded:.2f}s)")
+    print(f"Final equity: ${equity.iloc[-1]:,.2f} ({(equity.iloc[-1] / args.cash - 1) * 100:+.2f}%)")
+    print(f"Realized P/L: ${result.realized_pl:,.2f}")
+    print(f"Max drawdown: {((equity / equity.cummax()) - 1).min() * 100:.2f}%")
+    if args.trades:
+        result.trades.to_csv(args.trades, index=False)
+    if args.equity:
+        result.equity.to_csv(args.equity)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
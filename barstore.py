@@ -0,0 +1,173 @@
+import datetime
+import os
+import sqlite3
+import threading
+import time
+
+from lazy import lazy_import
+from marketdata import get_provider, slice_period
+from metrics import span
+from singleflight import SingleFlight
+
+DEFAULT_PATH = os.environ.get('PT_BAR_DB', 'bars.db')
+MIN_REFRESH = 60  # Seconds before the tail of a series is re-fetched
+
+pd = lazy_import('pandas')
+
+# yfinance periods from shortest to longest with their rough span in calendar days
+PERIOD_DAYS = [('1d', 1), ('5d', 7), ('1mo', 31), ('3mo', 92), ('6mo', 183), ('1y', 366), ('2y', 731), ('5y', 1827), ('10y', 3653)]
+
+
+def period_days(period):
+    # Calendar days a yfinance period string reaches back; 'max' is unbounded
+    if period == 'max':
+        return float('inf')
+    if period == 'ytd':
+        today = datetime.date.today()
+        return (today - today.replace(month=1, day=1)).days + 1
+    if period.endswith('mo'):
+        return int(period[:-2]) * 31
+    if period.endswith('y'):
+        return int(period[:-1]) * 366
+    if period.endswith('d'):
+        # Trading days; pad for weekends and holidays
+        return int(period[:-1]) * 7 // 5 + 3
+    raise ValueError(f"Unsupported period {period}")
+
+
+def covering_period(days):
+    for period, span in PERIOD_DAYS:
+        if span >= days:
+            return period
+    return 'max'
+
+
+class BarStore:
+    """SQLite store of OHLCV bars keyed by (ticker, interval, timestamp).
+
+    history() serves requests from disk and only asks the provider for bars newer than the
+    last one stored, or for a full download when the store doesn't reach back far enough.
+    """
+
+    def __init__(self, path=DEFAULT_PATH, min_refresh=MIN_REFRESH):
+        self.path = path
+        self.min_refresh = min_refresh
+        self._lock = threading.Lock()
+        self.hits = 0    # served from disk without asking the provider
+        self.misses = 0  # needed a full or tail download
+        # Concurrent requests for the same series (e.g. g and fa threads) share one download
+        self._flights = SingleFlight('bar history')
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS bars (
+                ticker TEXT NOT NULL,
+                interval TEXT NOT NULL,
+                ts INTEGER NOT NULL,
+                open REAL, high REAL, low REAL, close REAL, volume INTEGER,
+                PRIMARY KEY (ticker, interval, ts)
+            ) WITHOUT ROWID;
+            CREATE TABLE IF NOT EXISTS series (
+                ticker TEXT NOT NULL,
+                interval TEXT NOT NULL,
+                span_days REAL NOT NULL,
+                fetched_at REAL NOT NULL,
+                PRIMARY KEY (ticker, interval)
+            );
+        """)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def _series(self, ticker, interval):
+        row = self._conn.execute(
+            'SELECT span_days, fetched_at, (SELECT MAX(ts) FROM bars WHERE ticker=? AND interval=?) '
+            'FROM series WHERE ticker=? AND interval=?', (ticker, interval, ticker, interval)).fetchone()
+        return row  # (span_days, fetched_at, last_ts) or None
+
+    def _write(self, ticker, interval, hist):
+        if hist.empty:
+            return
+        index = pd.to_datetime(hist.index, utc=True)
+        ts = (index - pd.Timestamp(0, tz='UTC')) // pd.Timedelta(seconds=1)
+        volume = hist['Volume'] if 'Volume' in hist.columns else pd.Series(0, index=hist.index)
+        rows = [
+            (ticker, interval, int(t), _num(o), _num(h), _num(lo), _num(c), None if pd.isna(v) else int(v))
+            for t, o, h, lo, c, v in zip(ts, hist['Open'], hist['High'], hist['Low'], hist['Close'], volume)
+        ]
+        # Replace so a still-forming last bar is overwritten by its final values
+        self._conn.executemany('INSERT OR REPLACE INTO bars VALUES (?, ?, ?, ?, ?, ?, ?, ?)', rows)
+
+    def _read(self, ticker, interval, span_days=None):
+        # span_days limits the read to that many calendar days before the last stored bar
+        sql = 'SELECT ts, open, high, low, close, volume FROM bars WHERE ticker=? AND interval=?'
+        params = [ticker, interval]
+        if span_days is not None:
+            sql += ' AND ts >= (SELECT MAX(ts) FROM bars WHERE ticker=? AND interval=?) - ?'
+            params += [ticker, interval, int(span_days * 86400)]
+        rows = self._conn.execute(sql + ' ORDER BY ts', params).fetchall()
+        df = pd.DataFrame(rows, columns=['ts', 'Open', 'High', 'Low', 'Close', 'Volume'])
+        df.index = pd.to_datetime(df.pop('ts'), unit='s', utc=True)
+        df.index.name = 'Date'
+        return df
+
+    def history(self, ticker, period='1y', interval='1d', provider=None):
+        provider = provider or get_provider()
+        wanted = period_days(period)
+        self._flights.do((ticker, interval, period), lambda: self._refresh(ticker, period, interval, provider))
+        with self._lock, span('barstore.read'):
+            df = self._read(ticker, interval, None if wanted == float('inf') else wanted + 7)
+        return slice_period(df, period)
+
+    def _refresh(self, ticker, period, interval, provider):
+        # Brings the stored series up to date for this request, downloading as little as possible
+        wanted = period_days(period)
+        now = time.time()
+        with self._lock:
+            series = self._series(ticker, interval)
+        if series is None or series[2] is None or series[0] < wanted:
+            # Not stored, or not far enough back: full download of the requested period
+            self.misses += 1
+            with span('fetch.history'):
+                hist = provider.history(ticker, period=period, interval=interval)
+            with self._lock, self._conn:
+                self._write(ticker, interval, hist)
+                self._conn.execute('INSERT OR REPLACE INTO series VALUES (?, ?, ?, ?)', (ticker, interval, wanted, now))
+        elif now - series[1] >= self.min_refresh:
+            # Only fetch what's newer than the last stored bar
+            tail_days = (now - series[2]) / 86400 + 1
+            self.misses += 1
+            with span('fetch.history'):
+                hist = provider.history(ticker, period=covering_period(tail_days), interval=interval)
+            with self._lock, self._conn:
+                self._write(ticker, interval, hist)
+                self._conn.execute('UPDATE series SET fetched_at=? WHERE ticker=? AND interval=?', (now, ticker, interval))
+        else:
+            self.hits += 1
+
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {'hits': self.hits, 'misses': self.misses, 'hit_rate': (self.hits / total) if total else 0.0}
+
+
+def _num(x):
+    return None if pd.isna(x) else float(x)
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_bar_store(create=True):
+    # create=False returns None instead of opening the database when nothing has used it yet
+    global _store
+    with _store_lock:
+        if _store is None and create:
+            _store = BarStore()
+        return _store
+
+
+def history(ticker, period='1y', interval='1d'):
+    # Drop-in for provider.history() that goes through the shared on-disk store
+    return get_bar_store().history(ticker, period=period, interval=interval)
@@ -0,0 +1,219 @@
+"""Startup benchmark for the CLI (papertrading.py) and the GUI (pt.py).
+
+Each front end is started in fresh interpreters against SyntheticProvider and a throwaway
+portfolio, and the time to an interactive prompt is split into phases:
+
+    cli: import, load, first_list, ready
+    gui: import, window, load, first_refresh, ready
+
+The CLI is papertrading.py itself, run as __main__ with scripted input; the GUI is
+PaperTradingApp with its load and first render timed. ready is measured from process spawn,
+so it includes interpreter startup. The cold run uses an empty bytecode cache
+(PYTHONPYCACHEPREFIX), as after a fresh install; warm runs reuse it and report the median.
+Results are written as JSON lines to bench_output.txt.
+
+Budgets are advisory: phases over budget are flagged, and the exit status is only 1 with
+--strict (e.g. on a quiet machine used for regression checks).
+
+    python bench_startup.py [--runs 5] [--positions 50] [--budget cli.warm.ready=1.0] [--strict]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+# Seconds per <frontend>.<run>.<phase>; phases without a budget are reported only.
+# The CLI ones leave about 1.5x headroom over warm runs of papertrading.py with 50 positions.
+BUDGETS = {
+    'cli.cold.ready': 10.0,
+    'cli.warm.import': 1.0,
+    'cli.warm.load': 0.05,
+    'cli.warm.first_list': 3.0,
+    'cli.warm.ready': 1.5,
+    'gui.cold.ready': 15.0,
+    'gui.warm.import': 0.3,
+    'gui.warm.window': 0.5,
+    'gui.warm.load': 0.5,
+    'gui.warm.first_refresh': 2.0,
+    'gui.warm.ready': 1.5,
+}
+
+
+def child_cli(t0):
+    # Runs the real CLI (papertrading.py as __main__) with scripted input: 'list' at the first
+    # prompt, then 'exit'. Its output goes to a buffer, so formatting the table is still timed.
+    import builtins
+    import contextlib
+    import io
+    import runpy
+    from metrics import metrics
+    commands = iter(['list', 'exit'])
+    prompts, ready = [], []
+
+    def scripted_input(prompt=''):
+        prompts.append(time.perf_counter())
+        if not ready:
+            ready.append(time.time() - t0)
+        return next(commands)
+
+    start = time.perf_counter()
+    builtins.input = scripted_input
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            runpy.run_path(os.path.join(HERE, 'papertrading.py'), run_name='__main__')
+    finally:
+        builtins.input = input
+    load = {name: total for name, count, total, _, _ in metrics.snapshot()}['storage.load']
+    return {
+        # Everything before the first prompt other than reading the portfolio: imports,
+        # module setup and the account constructor
+        'import': prompts[0] - start - load,
+        'load': load,
+        'ready': ready[0],
+        'first_list': prompts[1] - prompts[0],
+    }
+
+
+def child_gui(t0):
+    phases = {}
+    start = time.perf_counter()
+    import tkinter as tk
+    import pt
+    phases['import'] = time.perf_counter() - start
+    try:
+        root = tk.Tk()
+    except tk.TclError as e:
+        return {'skipped': f"no display ({e})"}
+
+    load_time = []
+    load = pt.PaperTradingAccount.load
+
+    def timed_load(account):
+        start = time.perf_counter()
+        load(account)
+        load_time.append(time.perf_counter() - start)
+
+    rendered = []
+    render = pt.PaperTradingApp.render_portfolio
+
+    def timed_render(app, snapshot):
+        render(app, snapshot)
+        if not rendered:
+            rendered.append(time.perf_counter())
+            root.after(0, root.quit)
+
+    pt.PaperTradingAccount.load = timed_load
+    pt.PaperTradingApp.render_portfolio = timed_render
+    start = time.perf_counter()
+    app = pt.PaperTradingApp(root)
+    constructed = time.perf_counter()
+    phases['load'] = load_time[0]
+    phases['window'] = constructed - start - load_time[0]
+    # The input box is usable once the constructor returns and the event loop runs
+    phases['ready'] = time.time() - t0
+    root.after(30000, root.quit)
+    root.mainloop()
+    if not rendered:
+        return dict(phases, skipped='first refresh did not finish within 30s')
+    phases['first_refresh'] = rendered[0] - constructed
+    app.price_thread_running = False
+    root.destroy()
+    return phases
+
+
+def seed_portfolio(workdir, positions):
+    # CSV portfolio of synthetic tickers with costs near their synthetic prices
+    from marketdata import SyntheticProvider
+    from storage import CsvStorage
+    provider = SyntheticProvider()
+    tickers = [f'T{i:04d}' for i in range(positions)]
+    qtys = [(10.0 if i % 5 else -10.0) for i in range(positions)]
+    costs = [provider.start_price(t) * 0.95 for t in tickers]
+    cwd = os.getcwd()
+    os.chdir(workdir)
+    try:
+        CsvStorage().save({'tickers': tickers, 'qtys': qtys, 'costs': costs, 'cash': 100000.0, 'realized_pl': 0.0})
+    finally:
+        os.chdir(cwd)
+
+
+def run_child(frontend, workdir, pycache):
+    env = dict(os.environ, PT_SYNTHETIC_PRICES='0', PYTHONPYCACHEPREFIX=pycache, PT_STORAGE='csv',
+               PYTHONPATH=os.pathsep.join(p for p in (HERE, os.environ.get('PYTHONPATH')) if p))
+    env.pop('PT_REPLAY_DIR', None)
+    t0 = time.time()
+    proc = subprocess.run([sys.executable, os.path.abspath(__file__), '--child', frontend, '--t0', repr(t0)],
+                          cwd=workdir, env=env, capture_output=True, text=True, timeout=300)
+    if proc.returncode != 0:
+        raise RuntimeError(f"{frontend} startup failed:\n{proc.stderr}")
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--runs', type=int, default=5, help='warm runs per front end')
+    parser.add_argument('--positions', type=int, default=50)
+    parser.add_argument('--frontend', choices=('cli', 'gui'), action='append', help='default: both')
+    parser.add_argument('--budget', action='append', default=[], metavar='KEY=SECONDS',
+                        help='override a budget, e.g. gui.warm.ready=1.0')
+    parser.add_argument('--strict', action='store_true', help='exit with status 1 when a phase is over budget')
+    parser.add_argument('--output', default=os.path.join(HERE, 'bench_output.txt'))
+    parser.add_argument('--child', choices=('cli', 'gui'), help=argparse.SUPPRESS)
+    parser.add_argument('--t0', type=float, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        phases = child_cli(args.t0) if args.child == 'cli' else child_gui(args.t0)
+        print(json.dumps(phases))
+        return 0
+
+    budgets = dict(BUDGETS)
+    for item in args.budget:
+        key, _, seconds = item.partition('=')
+        budgets[key] = float(seconds)
+
+    results = []
+    with tempfile.TemporaryDirectory() as workdir, tempfile.TemporaryDirectory() as pycache:
+        seed_portfolio(workdir, args.positions)
+        for frontend in args.frontend or ('cli', 'gui'):
+            cold = run_child(frontend, workdir, pycache)
+            if 'skipped' in cold:
+                results.append({'frontend': frontend, 'skipped': cold['skipped']})
+                continue
+            warm = [run_child(frontend, workdir, pycache) for _ in range(args.runs)]
+            skipped = [w['skipped'] for w in warm if 'skipped' in w]
+            if skipped:
+                results.append({'frontend': frontend, 'skipped': skipped[0]})
+                continue
+            for run, phases in (('cold', cold), ('warm', {p: statistics.median(w[p] for w in warm) for p in cold})):
+                for phase, seconds in phases.items():
+                    key = f'{frontend}.{run}.{phase}'
+                    budget = budgets.get(key)
+                    results.append({'bench': 'startup', 'key': key, 'frontend': frontend, 'run': run, 'phase': phase,
+                                    'seconds': round(seconds, 4), 'budget': budget,
+                                    'ok': budget is None or seconds <= budget})
+
+    with open(args.output, 'w') as f:
+        for result in results:
+            f.write(json.dumps(result) + '\n')
+    failed = [r for r in results if r.get('ok') is False]
+    for r in results:
+        if 'skipped' in r:
+            print(f"{r['frontend']:<28} skipped: {r['skipped']}")
+        else:
+            budget = '' if r['budget'] is None else f"  (budget {r['budget']:.3f}s)"
+            print(f"{r['key']:<28} {r['seconds']:8.3f}s{budget}{'  OVER BUDGET' if not r['ok'] else ''}")
+    if failed and not args.strict:
+        print(f"{len(failed)} phase(s) over budget (advisory; pass --strict to fail on this)")
+    print(f"Results written to {args.output}")
+    return 1 if failed and args.strict else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,220 @@
+"""Benchmarks for the trading and valuation hot paths at growing portfolio sizes.
+
+Covers PaperTradingAccount.buy/sell/short/cover/sellall and get_portfolio, and the GUI's
+refresh (build_snapshot + render_portfolio) and sort_by_column, run headless against an
+in-memory stand-in for the Treeview. Prices come from SyntheticProvider, and the account
+uses CSV storage in a temporary directory, so nothing touches the network or the real
+portfolio files.
+
+For each operation and size it reports ops/sec, p50/p99 latency and peak memory (tracemalloc,
+measured in a separate pass so tracing does not skew the timings).
+
+    python bench_trading.py [--sizes 10,100,1000,10000] [--iterations 200] [--output results.jsonl]
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from marketdata import SyntheticProvider, set_provider
+from papertrading import PaperTradingAccount
+from storage import CsvStorage
+import pt
+
+SIZES = (10, 100, 1000, 10000)
+CASH = 1e12  # Enough that buys never fail for lack of cash
+
+
+class HeadlessTree:
+    """Just enough of ttk.Treeview for render_portfolio and sort_by_column, kept in memory."""
+
+    def __init__(self, columns):
+        self._columns = tuple(columns)
+        self._order = []
+        self._items = {}
+        self._height = 1
+        self._next = 0
+
+    def __getitem__(self, key):
+        if key != 'columns':
+            raise KeyError(key)
+        return self._columns
+
+    def insert(self, parent, index, values=(), tags=()):
+        self._next += 1
+        item = f'I{self._next:05X}'
+        self._items[item] = (values, tags)
+        self._order.append(item)
+        return item
+
+    def item(self, item, values=(), tags=()):
+        self._items[item] = (values, tags)
+
+    def delete(self, item):
+        del self._items[item]
+        self._order.remove(item)
+
+    def move(self, item, parent, index):
+        self._order.remove(item)
+        self._order.insert(index, item)
+
+    def get_children(self, parent=''):
+        return tuple(self._order)
+
+    def cget(self, option):
+        return self._height
+
+    def config(self, height=None):
+        self._height = height
+
+
+class HeadlessVar:
+    def set(self, value):
+        self.value = value
+
+
+class HeadlessLabel:
+    def config(self, **kwargs):
+        pass
+
+
+def headless_app(account):
+    # A PaperTradingApp with its Tk widgets swapped for in-memory stand-ins
+    app = object.__new__(pt.PaperTradingApp)
+    app.account = account
+    app.latest_prices = {}
+    app._last_sorted_col = None
+    app._last_sort_desc = False
+    app._row_items = {}
+    app._row_values = {}
+    app._row_keys = {}
+    app.tree = HeadlessTree(pt.PORTFOLIO_COLUMNS)
+    app._sort_orders = {col: False for col in app.tree['columns']}
+    app.cash_var = HeadlessVar()
+    app.pl_var = HeadlessVar()
+    app.pl_label = HeadlessLabel()
+    return app
+
+
+def make_account(size, provider):
+    # size positions, one in five short, with costs near the synthetic prices
+    tickers = [f'T{i:05d}' for i in range(size)]
+    qtys = [(-10.0 if i % 5 == 0 else 10.0) for i in range(size)]
+    costs = [provider.start_price(t) for t in tickers]
+    CsvStorage().save({'tickers': tickers, 'qtys': qtys, 'costs': costs, 'cash': CASH, 'realized_pl': 0.0})
+    account = PaperTradingAccount()
+    account.load()
+    return account
+
+
+def operations(account, app):
+    # name -> (setup, op) where setup(i) runs untimed before op(i)
+    positions = account.positions
+    longs = [t for t in positions.tickers if positions.get(t)[0] > 0]
+    shorts = [t for t in positions.tickers if positions.get(t)[0] < 0]
+    longs_closed = []
+
+    def reopen(i):
+        # Keep the portfolio size constant across sellall iterations
+        if longs_closed:
+            account.buy(longs_closed.pop(), 1000.0)
+
+    def sellall(i):
+        ticker = longs[i % len(longs)]
+        account.sellall(ticker)
+        longs_closed.append(ticker)
+
+    def refresh(i):
+        app.render_portfolio(app.build_snapshot())
+
+    columns = app.tree['columns']
+    return {
+        'buy': (None, lambda i: account.buy(longs[i % len(longs)], 100.0)),
+        'sell': (None, lambda i: account.sell(longs[i % len(longs)], 1.0)),
+        'short': (None, lambda i: account.short(shorts[i % len(shorts)], 100.0)),
+        'cover': (None, lambda i: account.cover(shorts[i % len(shorts)], 1.0)),
+        'sellall': (reopen, sellall),
+        'get_portfolio': (None, lambda i: account.get_portfolio()),
+        'build_snapshot': (None, lambda i: app.build_snapshot()),
+        'refresh': (None, refresh),
+        'sort_by_column': (None, lambda i: app.sort_by_column(columns[i % len(columns)])),
+    }
+
+
+def measure(setup, op, iterations, memory_iterations):
+    latencies = []
+    for i in range(iterations):
+        if setup is not None:
+            setup(i)
+        start = time.perf_counter_ns()
+        op(i)
+        latencies.append(time.perf_counter_ns() - start)
+    peak = 0
+    tracemalloc.start()
+    for i in range(iterations, iterations + memory_iterations):
+        if setup is not None:
+            setup(i)
+        base = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+        op(i)
+        peak = max(peak, tracemalloc.get_traced_memory()[1] - base)
+    tracemalloc.stop()
+    latencies.sort()
+    total = sum(latencies) / 1e9
+    return {
+        'iterations': iterations,
+        'ops_per_sec': iterations / total if total else float('inf'),
+        'p50_ms': statistics.median(latencies) / 1e6,
+        'p99_ms': latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] / 1e6,
+        'peak_kib': peak / 1024,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', default=','.join(map(str, SIZES)))
+    parser.add_argument('--iterations', type=int, default=200)
+    parser.add_argument('--memory-iterations', type=int, default=20)
+    parser.add_argument('--ops', help='comma-separated subset of operations')
+    parser.add_argument('--output', help='also write JSON lines here')
+    args = parser.parse_args()
+
+    sizes = [int(s) for s in args.sizes.split(',')]
+    provider = SyntheticProvider(seed=0)
+    set_provider(provider)
+    results = []
+    cwd = os.getcwd()
+    print(f"{'op':<16}{'size':>8}{'ops/sec':>12}{'p50 ms':>10}{'p99 ms':>10}{'peak KiB':>11}")
+    try:
+        for size in sizes:
+            with tempfile.TemporaryDirectory() as workdir:
+                os.chdir(workdir)
+                account = make_account(size, provider)
+                app = headless_app(account)
+                # Warm the price caches and the rendered table the way a running GUI would
+                app.render_portfolio(app.build_snapshot())
+                ops = operations(account, app)
+                for name in (args.ops.split(',') if args.ops else ops):
+                    setup, op = ops[name]
+                    result = dict(bench='trading', op=name, size=size,
+                                  **measure(setup, op, args.iterations, args.memory_iterations))
+                    results.append(result)
+                    print(f"{name:<16}{size:>8}{result['ops_per_sec']:>12,.0f}{result['p50_ms']:>10.3f}"
+                          f"{result['p99_ms']:>10.3f}{result['peak_kib']:>11,.1f}")
+                account.storage.close()
+                os.chdir(cwd)
+    finally:
+        os.chdir(cwd)
+    if args.output:
+        with open(args.output, 'w') as f:
+            for result in results:
+                f.write(json.dumps(result) + '\n')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,311 @@
+"""Push-based price feed: a tick stream client and a local stand-in server that replays ticks.
+
+The wire protocol is newline-delimited JSON over TCP:
+
+    client -> server   {"op": "subscribe", "tickers": ["AAPL", "MSFT"]}
+                       {"op": "unsubscribe", "tickers": ["MSFT"]}
+    server -> client   {"ticker": "AAPL", "price": 189.91, "ts": 1718040000.0}
+
+The server only sends a tick when a subscribed ticker's price changes, and sends the last
+known price once on subscribe, so a client's traffic is proportional to price changes rather
+than to bars x tickers. Run a stand-in server with one of:
+
+    python feed.py --replay-dir replay --speed 60    # 1m bars recorded by marketdata.record()
+    python feed.py --ticks ticks.csv                 # CSV with ts,ticker,price columns
+    python feed.py --synthetic                       # SyntheticProvider random walks
+
+and point the GUI at it with PT_STREAM=localhost:8765.
+"""
+import argparse
+import csv
+import json
+import os
+import socket
+import socketserver
+import threading
+import time
+
+DEFAULT_PORT = 8765
+SYNTHETIC_INTERVAL = 1.0  # Seconds between synthetic ticks per ticker
+
+
+def parse_address(address):
+    # 'host:port', ':port' or 'port' -> (host, port)
+    host, _, port = address.rpartition(':')
+    return (host or 'localhost', int(port or DEFAULT_PORT))
+
+
+def load_ticks(path):
+    # [(epoch seconds, ticker, price)] from a ts,ticker,price CSV (ts in epoch seconds or ISO 8601)
+    import datetime
+    ticks = []
+    with open(path, newline='') as f:
+        for row in csv.DictReader(f):
+            ts = row['ts']
+            try:
+                ts = float(ts)
+            except ValueError:
+                ts = datetime.datetime.fromisoformat(ts).timestamp()
+            ticks.append((ts, row['ticker'], float(row['price'])))
+    ticks.sort(key=lambda tick: tick[0])
+    return ticks
+
+
+def replay_dir_ticks(root, interval='1m'):
+    # Every recorded bar close in a ReplayProvider directory as a tick, merged across tickers
+    from marketdata import ReplayProvider
+    provider = ReplayProvider(root)
+    ticks = []
+    for ticker in sorted(os.listdir(root)):
+        try:
+            closes = provider.bars(ticker, interval)['Close'].dropna()
+        except (ValueError, NotADirectoryError):
+            continue
+        ticks.extend((ts.timestamp(), ticker, float(price)) for ts, price in closes.items())
+    ticks.sort(key=lambda tick: tick[0])
+    return ticks
+
+
+class _FeedHandler(socketserver.StreamRequestHandler):
+    def setup(self):
+        super().setup()
+        self.subscriptions = set()
+        self.send_lock = threading.Lock()
+        self.server.add_client(self)
+
+    def handle(self):
+        for line in self.rfile:
+            try:
+                message = json.loads(line)
+                tickers = set(message.get('tickers', ()))
+            except (ValueError, TypeError, AttributeError):
+                continue
+            if message.get('op') == 'subscribe':
+                with self.server.lock:
+                    added = tickers - self.subscriptions
+                    self.subscriptions |= tickers
+                    known = [(t, self.server.last[t]) for t in added if t in self.server.last]
+                self.send([{'ticker': t, 'price': price, 'ts': ts} for t, (price, ts) in known])
+            elif message.get('op') == 'unsubscribe':
+                with self.server.lock:
+                    self.subscriptions -= tickers
+
+    def send(self, messages):
+        if not messages:
+            return
+        data = ''.join(json.dumps(m) + '\n' for m in messages).encode()
+        try:
+            with self.send_lock:
+                self.wfile.write(data)
+                self.wfile.flush()
+        except OSError:
+            # Client went away; handle() ends when its socket closes
+            self.server.remove_client(self)
+
+    def finish(self):
+        self.server.remove_client(self)
+        super().finish()
+
+
+class TickServer(socketserver.ThreadingTCPServer):
+    """Local stand-in for a streaming price feed.
+
+    Replays recorded ticks (see load_ticks/replay_dir_ticks) at `speed` times real time,
+    looping at the end, or with ticks=None makes up a random walk for every subscribed
+    ticker using a SyntheticProvider.
+    """
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, address=('localhost', DEFAULT_PORT), ticks=None, speed=1.0, loop=True, provider=None):
+        super().__init__(address, _FeedHandler)
+        self.ticks = ticks
+        self.speed = speed
+        self.loop = loop
+        self.provider = provider
+        self.lock = threading.Lock()
+        self.clients = set()
+        self.last = {}  # ticker -> (price, ts) last published
+        self.published = 0
+        self._stopped = threading.Event()
+
+    def add_client(self, client):
+        with self.lock:
+            self.clients.add(client)
+
+    def remove_client(self, client):
+        with self.lock:
+            self.clients.discard(client)
+
+    def publish(self, ticker, price, ts=None):
+        # Fan a tick out to subscribers; an unchanged price is not sent again
+        ts = time.time() if ts is None else ts
+        with self.lock:
+            previous = self.last.get(ticker)
+            self.last[ticker] = (price, ts)
+            if previous is not None and previous[0] == price:
+                return
+            targets = [c for c in self.clients if ticker in c.subscriptions]
+        message = [{'ticker': ticker, 'price': price, 'ts': ts}]
+        for client in targets:
+            client.send(message)
+        self.published += 1
+
+    def start(self):
+        # Serve and replay on background threads; returns the bound (host, port)
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        threading.Thread(target=self._replay, daemon=True).start()
+        return self.server_address
+
+    def stop(self):
+        self._stopped.set()
+        self.shutdown()
+        self.server_close()
+
+    def _replay(self):
+        if not self.ticks:
+            self._synthetic()
+            return
+        while not self._stopped.is_set():
+            start = time.monotonic()
+            first = self.ticks[0][0]
+            for ts, ticker, price in self.ticks:
+                wait = (ts - first) / self.speed - (time.monotonic() - start)
+                if wait > 0 and self._stopped.wait(wait):
+                    return
+                self.publish(ticker, price, ts)
+            if not self.loop:
+                return
+
+    def _synthetic(self):
+        if self.provider is None:
+            from marketdata import SyntheticProvider
+            self.provider = SyntheticProvider()
+        while not self._stopped.wait(SYNTHETIC_INTERVAL / self.speed):
+            with self.lock:
+                tickers = set().union(*(c.subscriptions for c in self.clients))
+            for ticker, price in self.provider.latest_prices(sorted(tickers)).items():
+                self.publish(ticker, round(price, 2))
+
+
+class StreamingFeed:
+    """Client side: keeps one connection to a TickServer and calls on_tick(ticker, price, ts)
+    from its reader thread for every tick.
+
+    subscribe() takes the full set of wanted tickers and sends only the difference. A dropped
+    connection is retried with exponential backoff and the subscriptions are replayed.
+    """
+
+    def __init__(self, address, on_tick, reconnect=1.0, max_reconnect=30.0):
+        self.address = parse_address(address) if isinstance(address, str) else address
+        self.on_tick = on_tick
+        self.reconnect = reconnect
+        self.max_reconnect = max_reconnect
+        self.ticks = 0
+        self.connected = False
+        self.last_error = None  # Last exception raised by on_tick
+        self._wanted = set()
+        self._sock = None
+        self._lock = threading.Lock()  # guards _wanted/_sock and serializes writes
+        self._stopped = threading.Event()
+
+    def start(self):
+        threading.Thread(target=self._run, daemon=True).start()
+
+    def subscribe(self, tickers):
+        wanted = set(tickers)
+        with self._lock:
+            added, removed = wanted - self._wanted, self._wanted - wanted
+            self._wanted = wanted
+            if self._sock is not None:
+                self._send('unsubscribe', removed)
+                self._send('subscribe', added)
+
+    def close(self):
+        self._stopped.set()
+        with self._lock:
+            if self._sock is not None:
+                try:
+                    self._sock.shutdown(socket.SHUT_RDWR)
+                except OSError:
+                    pass
+
+    def _send(self, op, tickers):
+        # Caller holds _lock
+        if not tickers:
+            return
+        try:
+            self._sock.sendall((json.dumps({'op': op, 'tickers': sorted(tickers)}) + '\n').encode())
+        except OSError:
+            pass  # The reader notices the broken connection and reconnects
+
+    def _run(self):
+        delay = self.reconnect
+        while not self._stopped.is_set():
+            try:
+                sock = socket.create_connection(self.address, timeout=5)
+                sock.settimeout(None)
+            except OSError:
+                if self._stopped.wait(delay):
+                    return
+                delay = min(delay * 2, self.max_reconnect)
+                continue
+            delay = self.reconnect
+            with self._lock:
+                self._sock = sock
+                self._send('subscribe', self._wanted)
+            self.connected = True
+            try:
+                for line in sock.makefile('r'):
+                    try:
+                        tick = json.loads(line)
+                        ticker, price = tick['ticker'], tick['price']
+                    except (ValueError, KeyError, TypeError):
+                        continue
+                    self.ticks += 1
+                    try:
+                        self.on_tick(ticker, price, tick.get('ts'))
+                    except Exception as e:
+                        # A failing callback must not stop the stream
+                        self.last_error = e
+            except OSError:
+                pass
+            finally:
+                self.connected = False
+                with self._lock:
+                    self._sock = None
+                sock.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Local stand-in price feed server')
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument('--replay-dir', help='directory written by marketdata.record()')
+    source.add_argument('--ticks', help='CSV with ts,ticker,price columns')
+    source.add_argument('--synthetic', action='store_true', help='random walks for whatever is subscribed')
+    parser.add_argument('--host', default='localhost')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--speed', type=float, default=1.0, help='replay speed multiplier')
+    args = parser.parse_args()
+
+    if args.replay_dir:
+        ticks = replay_dir_ticks(args.replay_dir)
+    elif args.ticks:
+        ticks = load_ticks(args.ticks)
+    else:
+        ticks = None
+    if ticks is not None and not ticks:
+        parser.error('no ticks found')
+    server = TickServer((args.host, args.port), ticks=ticks, speed=args.speed)
+    host, port = server.start()
+    print(f"Serving {'synthetic' if ticks is None else len(ticks)} ticks on {host}:{port} (Ctrl+C to stop)")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        server.stop()
+
+
+if __name__ == '__main__':
+    main()
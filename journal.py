@@ -0,0 +1,134 @@
+import json
+import os
+import threading
+
+from metrics import span
+
+FSYNC_INTERVAL = 0.2   # Seconds between group fsyncs of appended records
+COMPACT_EVERY = 500    # Records after which the owner should write a snapshot and reset
+
+
+class Journal:
+    """Append-only JSON-lines log of fills.
+
+    Every record is written and flushed immediately; fsync is batched on a background timer so
+    a burst of trades shares one disk sync. Records carry an increasing seq so a snapshot can
+    say which prefix it already contains (see PaperTradingAccount.save/load).
+    """
+
+    def __init__(self, path, fsync_interval=FSYNC_INTERVAL):
+        self.path = path
+        self.fsync_interval = fsync_interval
+        self.seq = 0
+        self.pending = 0  # records appended since the last reset
+        self._file = None
+        self._dirty = False
+        self._timer = None
+        self._lock = threading.Lock()
+
+    def replay(self, after_seq=0):
+        # Records with seq > after_seq, oldest first. A torn last line from a crash is ignored,
+        # and so is a batch (see append_many) that did not get all of its lines written.
+        records = []
+        if not os.path.exists(self.path):
+            return records
+        good = 0  # byte offset just past the last complete record
+        batch_start, batch = 0, []  # offset and records of a batch still being read
+        with open(self.path, 'rb') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    break
+                if not line.endswith(b'\n'):
+                    break
+                if 'batch' in record:
+                    index, size = record['batch']
+                    if index == 0:
+                        batch_start, batch = good, []
+                    batch.append(record)
+                    good += len(line)
+                    if index < size - 1:
+                        continue
+                    group, batch = batch, []
+                else:
+                    good += len(line)
+                    group = [record]
+                for record in group:
+                    self.seq = max(self.seq, record['seq'])
+                    if record['seq'] > after_seq:
+                        records.append(record)
+        if batch:
+            good = batch_start
+        if good != os.path.getsize(self.path):
+            # Drop the torn tail so new appends start on a clean line
+            with open(self.path, 'r+b') as f:
+                f.truncate(good)
+        self.pending = len(records)
+        return records
+
+    def append(self, record):
+        return self.append_many([record])
+
+    def append_many(self, records):
+        # Several records in one write. More than one are tagged 'batch': [index, size] so
+        # replay applies them all or none of them. Returns the last seq.
+        with self._lock:
+            if self._file is None:
+                if self.seq == 0:
+                    self.replay()
+                self._file = open(self.path, 'a')
+            lines = []
+            for i, record in enumerate(records):
+                self.seq += 1
+                record = dict(record, seq=self.seq)
+                if len(records) > 1:
+                    record['batch'] = [i, len(records)]
+                lines.append(json.dumps(record) + '\n')
+            self.pending += len(records)
+            self._file.write(''.join(lines))
+            self._file.flush()
+            if not self._dirty:
+                self._dirty = True
+                self._timer = threading.Timer(self.fsync_interval, self.sync)
+                self._timer.daemon = True
+                self._timer.start()
+            return self.seq
+
+    def sync(self):
+        with self._lock:
+            if self._file is not None and self._dirty:
+                with span('journal.fsync'):
+                    os.fsync(self._file.fileno())
+            self._dirty = False
+
+    def reset(self, upto=None):
+        # Called once a snapshot covering records up to seq `upto` (default: all) is safely on disk.
+        # Records appended after that (e.g. while a background save was writing) are kept.
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+            self._dirty = False
+            keep = []
+            if upto is not None and upto < self.seq and os.path.exists(self.path):
+                with open(self.path) as f:
+                    keep = [line for line in f if line.endswith('\n') and json.loads(line)['seq'] > upto]
+            self.pending = len(keep)
+            tmp = self.path + '.tmp'
+            with open(tmp, 'w') as f:
+                f.writelines(keep)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp, self.path)
+
+    def close(self):
+        self.sync()
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+            if self._file is not None:
+                self._file.close()
+                self._file = None
@@ -0,0 +1,22 @@
+import importlib
+import types
+
+
+class LazyModule(types.ModuleType):
+    """Module placeholder that imports the real module on first attribute access.
+
+    `pd = lazy_import('pandas')` at the top of a file costs nothing until pd.<name> is used,
+    which keeps pandas, matplotlib and yfinance off the startup path. Once loaded, the real
+    module's attributes are copied in so later lookups are plain attribute hits.
+    """
+
+    def __getattr__(self, attr):
+        # Only reached for names not yet in __dict__, i.e. before the first load
+        module = importlib.import_module(self.__name__)
+        self.__dict__.update(module.__dict__)
+        return getattr(module, attr)
+
+
+def lazy_import(name):
+    return LazyModule(name)
+
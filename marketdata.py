@@ -0,0 +1,348 @@
+import abc
+import json
+import os
+import random
+import threading
+import time
+import zlib
+
+from lazy import lazy_import
+from pricecache import price_cache, prev_close_cache
+from scheduler import exchange_date
+
+np = lazy_import('numpy')
+pd = lazy_import('pandas')
+yf = lazy_import('yfinance')
+
+# Quarterly statements served by providers, keyed the way show_financials asks for them
+STATEMENTS = ('financials', 'balance_sheet', 'cashflow')
+
+
+class MarketDataProvider(abc.ABC):
+    """Source of prices, bars, company info and statements.
+
+    Subclasses implement the abstract methods; the batch methods fall back to one call per ticker.
+    """
+
+    @abc.abstractmethod
+    def latest_price(self, ticker):
+        # Latest traded price, raises if there is none
+        ...
+
+    def latest_prices(self, tickers):
+        # {ticker: price} for the tickers that have a price; missing tickers are left out
+        result = {}
+        for ticker in tickers:
+            try:
+                result[ticker] = self.latest_price(ticker)
+            except Exception:
+                pass
+        return result
+
+    def previous_closes(self, tickers):
+        # {ticker: previous session close}; tickers without a daily bar before today are left out
+        result = {}
+        for ticker in tickers:
+            try:
+                close = previous_close(ticker, self.history(ticker, period='5d')['Close'].dropna())
+            except Exception:
+                continue
+            if close is not None:
+                result[ticker] = close
+        return result
+
+    @abc.abstractmethod
+    def history(self, ticker, period='1y', interval='1d'):
+        # OHLCV DataFrame indexed by timestamp, same shape as yf.Ticker.history
+        ...
+
+    @abc.abstractmethod
+    def info(self, ticker):
+        # Company info dict, same keys as yf.Ticker.info
+        ...
+
+    @abc.abstractmethod
+    def statement(self, ticker, kind):
+        # Quarterly statement DataFrame (line items x periods), kind is one of STATEMENTS
+        ...
+
+
+class YFinanceProvider(MarketDataProvider):
+    def latest_price(self, ticker):
+        hist = yf.Ticker(ticker).history(period='1d', interval='1m')
+        if hist.empty:
+            raise ValueError(f"No price data found for {ticker}")
+        return hist['Close'].iloc[-1]
+
+    def _download_closes(self, tickers, period, interval):
+        # One batched download, returns {ticker: Close series without NaNs}
+        tickers = [t for t in dict.fromkeys(tickers)]
+        if not tickers:
+            return {}
+        data = yf.download(' '.join(tickers), period=period, interval=interval, progress=False, group_by='ticker', threads=True, auto_adjust=False)
+        result = {}
+        for ticker in tickers:
+            try:
+                if isinstance(data.columns, pd.MultiIndex):
+                    result[ticker] = data[ticker]['Close'].dropna()
+                else:
+                    # Single ticker on older yfinance: data is not multi-indexed
+                    result[ticker] = data['Close'].dropna()
+            except Exception:
+                pass
+        return result
+
+    def latest_prices(self, tickers):
+        closes = self._download_closes(tickers, '1d', '1m')
+        return {t: c.iloc[-1] for t, c in closes.items() if not c.empty}
+
+    def previous_closes(self, tickers):
+        # A few days of daily bars so weekends/holidays still leave a session before today
+        closes = self._download_closes(tickers, '5d', '1d')
+        result = {t: previous_close(t, c) for t, c in closes.items()}
+        return {t: close for t, close in result.items() if close is not None}
+
+    def history(self, ticker, period='1y', interval='1d'):
+        return yf.Ticker(ticker).history(period=period, interval=interval)
+
+    def info(self, ticker):
+        return yf.Ticker(ticker).info
+
+    def statement(self, ticker, kind):
+        if kind not in STATEMENTS:
+            raise ValueError(f"Unknown statement {kind}")
+        return getattr(yf.Ticker(ticker), f'quarterly_{kind}')
+
+
+class ReplayProvider(MarketDataProvider):
+    """Serves recorded data from disk, no network.
+
+    Layout under root (see record()):
+        <TICKER>/bars_<interval>.csv   OHLCV bars, first column is the timestamp
+        <TICKER>/info.json
+        <TICKER>/<statement>.csv       one of STATEMENTS
+    """
+
+    def __init__(self, root):
+        self.root = root
+        self._bars = {}  # (ticker, interval) -> DataFrame, files are read once
+        self._lock = threading.Lock()
+
+    def _path(self, ticker, name):
+        return os.path.join(self.root, ticker, name)
+
+    def bars(self, ticker, interval='1d'):
+        key = (ticker, interval)
+        with self._lock:
+            df = self._bars.get(key)
+        if df is None:
+            path = self._path(ticker, f'bars_{interval}.csv')
+            if not os.path.exists(path):
+                raise ValueError(f"No recorded {interval} bars for {ticker}")
+            df = pd.read_csv(path, index_col=0)
+            df.index = pd.to_datetime(df.index, utc=True)
+            df = df.sort_index()
+            with self._lock:
+                self._bars[key] = df
+        return df
+
+    def latest_price(self, ticker):
+        # Most recent close across the finest interval recorded
+        for interval in ('1m', '1d'):
+            try:
+                closes = self.bars(ticker, interval)['Close'].dropna()
+            except ValueError:
+                continue
+            if not closes.empty:
+                return closes.iloc[-1]
+        raise ValueError(f"No price data found for {ticker}")
+
+    def history(self, ticker, period='1y', interval='1d'):
+        try:
+            df = self.bars(ticker, interval)
+        except ValueError:
+            return pd.DataFrame(columns=['Open', 'High', 'Low', 'Close', 'Volume'])
+        return slice_period(df, period)
+
+    def info(self, ticker):
+        path = self._path(ticker, 'info.json')
+        if not os.path.exists(path):
+            return {}
+        with open(path) as f:
+            return json.load(f)
+
+    def statement(self, ticker, kind):
+        if kind not in STATEMENTS:
+            raise ValueError(f"Unknown statement {kind}")
+        path = self._path(ticker, f'{kind}.csv')
+        if not os.path.exists(path):
+            return pd.DataFrame()
+        df = pd.read_csv(path, index_col=0)
+        df.columns = pd.to_datetime(df.columns)
+        return df
+
+
+class SyntheticProvider(MarketDataProvider):
+    """Deterministic made-up data for benchmarks and offline runs, no network.
+
+    Every ticker starts at a price derived from its name and seed; each latest_price call moves
+    it one small random-walk step. latency is slept once per request, batched or not, to stand
+    in for a network round trip. requests counts upstream calls.
+    """
+
+    def __init__(self, seed=0, latency=0.0):
+        self.seed = seed
+        self.latency = latency
+        self.requests = 0
+        self._walks = {}  # ticker -> [rng, last price]
+        self._bars = {}   # (ticker, interval) -> DataFrame
+        self._lock = threading.Lock()
+
+    def _request(self):
+        with self._lock:
+            self.requests += 1
+        if self.latency:
+            time.sleep(self.latency)
+
+    def start_price(self, ticker):
+        return random.Random(f'{self.seed}:{ticker}').uniform(5, 500)
+
+    def _step(self, ticker):
+        with self._lock:
+            walk = self._walks.get(ticker)
+            if walk is None:
+                walk = self._walks[ticker] = [random.Random(f'{self.seed}:{ticker}:walk'), self.start_price(ticker)]
+            walk[1] *= 1 + walk[0].gauss(0, 0.001)
+            return walk[1]
+
+    def latest_price(self, ticker):
+        self._request()
+        return self._step(ticker)
+
+    def latest_prices(self, tickers):
+        self._request()
+        return {t: self._step(t) for t in dict.fromkeys(tickers)}
+
+    def previous_closes(self, tickers):
+        self._request()
+        return {t: self.start_price(t) for t in dict.fromkeys(tickers)}
+
+    def history(self, ticker, period='1y', interval='1d'):
+        self._request()
+        key = (ticker, interval)
+        with self._lock:
+            df = self._bars.get(key)
+        if df is None:
+            df = self._make_bars(ticker, interval)
+            with self._lock:
+                self._bars[key] = df
+        return slice_period(df, period)
+
+    def _make_bars(self, ticker, interval):
+        # Ten years of business days, or five sessions of minute bars, ending today and
+        # finishing at start_price so history agrees with previous_closes
+        end = pd.Timestamp.now(tz='UTC').normalize()
+        if interval == '1d':
+            index = pd.bdate_range(end=end, periods=2610, tz='UTC')
+            vol = 0.015
+        elif interval == '1m':
+            days = pd.bdate_range(end=end, periods=5, tz='UTC')
+            index = pd.DatetimeIndex([d + pd.Timedelta(minutes=870 + m) for d in days for m in range(390)])
+            vol = 0.0007
+        else:
+            raise ValueError(f"Unsupported interval {interval}")
+        rng = np.random.default_rng(zlib.crc32(f'{self.seed}:{ticker}:{interval}'.encode()))
+        steps = rng.normal(0, vol, len(index))
+        close = self.start_price(ticker) * np.exp(np.cumsum(steps) - steps.sum())
+        open_ = np.concatenate([[close[0]], close[:-1]])
+        spread = np.abs(rng.normal(0, vol / 2, len(index)))
+        return pd.DataFrame({
+            'Open': open_,
+            'High': np.maximum(open_, close) * (1 + spread),
+            'Low': np.minimum(open_, close) * (1 - spread),
+            'Close': close,
+            'Volume': rng.integers(10_000, 5_000_000, len(index)),
+        }, index=index)
+
+    def info(self, ticker):
+        return {'shortName': ticker, 'longBusinessSummary': f"{ticker} is a synthetic ticker used for offline runs."}
+
+    def statement(self, ticker, kind):
+        if kind not in STATEMENTS:
+            raise ValueError(f"Unknown statement {kind}")
+        return pd.DataFrame()
+
+
+def previous_close(ticker, closes, now=None):
+    # Close of the last daily bar dated before today's exchange date. Before the open the
+    # newest bar is the last session, so a fixed iloc[-2] would be one session too old.
+    # Daily bars are labelled with their session date, so the index is not tz-converted.
+    if closes.empty:
+        return None
+    before = closes[np.asarray(closes.index.date) < exchange_date(ticker, now)]
+    return before.iloc[-1] if len(before) else None
+
+
+def slice_period(df, period):
+    # Trim bars to a yfinance-style period ('2d', '5d', '1mo', '1y', 'ytd', 'max'), relative to the last bar
+    if df.empty or period in (None, 'max'):
+        return df
+    last = df.index[-1]
+    if period == 'ytd':
+        return df[df.index >= last.replace(month=1, day=1, hour=0, minute=0, second=0, microsecond=0)]
+    if period.endswith('d'):
+        # N trading days = the last N distinct dates present
+        days = pd.Index(df.index.date).unique()[-int(period[:-1]):]
+        return df[pd.Index(df.index.date).isin(days)]
+    if period.endswith('mo'):
+        return df[df.index > last - pd.DateOffset(months=int(period[:-2]))]
+    if period.endswith('y'):
+        return df[df.index > last - pd.DateOffset(years=int(period[:-1]))]
+    raise ValueError(f"Unsupported period {period}")
+
+
+def record(tickers, root, source=None):
+    # Capture live data into a ReplayProvider directory
+    source = source or YFinanceProvider()
+    for ticker in tickers:
+        os.makedirs(os.path.join(root, ticker), exist_ok=True)
+        for period, interval in (('5y', '1d'), ('5d', '1m')):
+            hist = source.history(ticker, period=period, interval=interval)
+            if not hist.empty:
+                hist.to_csv(os.path.join(root, ticker, f'bars_{interval}.csv'))
+        with open(os.path.join(root, ticker, 'info.json'), 'w') as f:
+            json.dump(source.info(ticker), f, default=str)
+        for kind in STATEMENTS:
+            df = source.statement(ticker, kind)
+            if not df.empty:
+                df.to_csv(os.path.join(root, ticker, f'{kind}.csv'))
+
+
+_provider = None
+_provider_lock = threading.Lock()
+
+
+def get_provider():
+    # Defaults to yfinance; set PT_REPLAY_DIR to serve recorded data instead, or
+    # PT_SYNTHETIC_PRICES=<seed> for made-up deterministic data
+    global _provider
+    with _provider_lock:
+        if _provider is None:
+            replay_dir = os.environ.get('PT_REPLAY_DIR')
+            synthetic_seed = os.environ.get('PT_SYNTHETIC_PRICES')
+            if replay_dir:
+                _provider = ReplayProvider(replay_dir)
+            elif synthetic_seed is not None:
+                _provider = SyntheticProvider(seed=int(synthetic_seed or 0))
+            else:
+                _provider = YFinanceProvider()
+        return _provider
+
+
+def set_provider(provider):
+    global _provider
+    with _provider_lock:
+        _provider = provider
+    # Quotes from the previous source must not leak into the new one
+    price_cache.invalidate()
+    prev_close_cache.invalidate()
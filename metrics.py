@@ -0,0 +1,99 @@
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+WINDOW = 1024  # Most recent samples kept per span for percentiles
+
+
+class Histogram:
+    """Latency samples for one span: lifetime count/total/max plus a rolling window for percentiles."""
+
+    def __init__(self, window=WINDOW):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.samples = deque(maxlen=window)
+
+    def add(self, seconds):
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+        self.samples.append(seconds)
+
+    def percentile(self, q):
+        # Nearest-rank percentile over the window, q in [0, 100]
+        if not self.samples:
+            return 0.0
+        ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * q / 100))]
+
+
+class Metrics:
+    """Thread-safe registry of named timing spans.
+
+    Wrap hot-path calls in `with span('fetch.prices'):`; the cost is two perf_counter
+    calls and a lock, so spans can stay on in normal use.
+    """
+
+    def __init__(self, window=WINDOW):
+        self.window = window
+        self._histograms = {}
+        self._lock = threading.Lock()
+
+    def record(self, name, seconds):
+        with self._lock:
+            hist = self._histograms.get(name)
+            if hist is None:
+                hist = self._histograms[name] = Histogram(self.window)
+            hist.add(seconds)
+
+    @contextmanager
+    def span(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - start)
+
+    def snapshot(self):
+        # [(name, count, p50, p95, max)] in seconds, sorted by name
+        with self._lock:
+            return [(name, h.count, h.percentile(50), h.percentile(95), h.max)
+                    for name, h in sorted(self._histograms.items())]
+
+    def reset(self):
+        with self._lock:
+            self._histograms.clear()
+
+
+metrics = Metrics()
+span = metrics.span
+
+
+def format_stats():
+    # Text report for the `stats` command: span latencies, then cache hit rates
+    from pricecache import price_cache, prev_close_cache
+    from barstore import get_bar_store
+    from singleflight import GROUPS
+    lines = [f"{'span':<22}{'count':>8}{'p50 ms':>10}{'p95 ms':>10}{'max ms':>10}"]
+    rows = metrics.snapshot()
+    for name, count, p50, p95, peak in rows:
+        lines.append(f"{name:<22}{count:>8}{p50 * 1000:>10.2f}{p95 * 1000:>10.2f}{peak * 1000:>10.2f}")
+    if not rows:
+        lines.append("(nothing timed yet)")
+    lines.append("")
+    lines.append(f"{'cache':<22}{'hits':>8}{'misses':>10}{'hit rate':>10}")
+    caches = [('price', price_cache), ('previous close', prev_close_cache)]
+    if get_bar_store(create=False) is not None:
+        caches.append(('bars', get_bar_store()))
+    for name, cache in caches:
+        s = cache.stats()
+        lines.append(f"{name:<22}{s['hits']:>8}{s['misses']:>10}{s['hit_rate']:>10.1%}")
+    lines.append("")
+    lines.append(f"{'single-flight':<22}{'fetches':>8}{'shared':>10}{'shared %':>10}")
+    for group in GROUPS:
+        s = group.stats()
+        lines.append(f"{group.name:<22}{s['fetches']:>8}{s['shared']:>10}{s['shared_rate']:>10.1%}")
+    return '\n'.join(lines)
@@ -0,0 +1,129 @@
+import heapq
+from collections import namedtuple
+
+ORDER_KINDS = ('limit', 'stop', 'stoplimit')
+BUY_SIDE = ('buy', 'cover')  # Orders that want a low price; sell, sellall and short want a high one
+
+# A resting order. amount is in dollars like the market orders (None for sellall); limit/stop
+# are trigger prices, None when the kind does not use them. triggered is set once a stop-limit's
+# stop has been hit and it is waiting on its limit.
+Order = namedtuple('Order', ['id', 'op', 'ticker', 'kind', 'amount', 'limit', 'stop', 'triggered'])
+
+
+def trigger(order):
+    # (heap, key) the order currently waits in: 'below' fires when price <= key, 'above' when price >= key
+    buy_side = order.op in BUY_SIDE
+    if order.kind == 'limit' or (order.kind == 'stoplimit' and order.triggered):
+        return ('below' if buy_side else 'above'), order.limit
+    return ('above' if buy_side else 'below'), order.stop
+
+
+def describe(order):
+    amount = '' if order.amount is None else f" ${order.amount:,.0f}"
+    if order.kind == 'limit':
+        prices = f"limit ${order.limit:,.2f}"
+    elif order.kind == 'stop':
+        prices = f"stop ${order.stop:,.2f}"
+    else:
+        prices = f"stop ${order.stop:,.2f} limit ${order.limit:,.2f}" + (" (stop hit)" if order.triggered else "")
+    return f"#{order.id} {order.op}{amount} {order.ticker} {prices}"
+
+
+class OrderBook:
+    """Resting limit, stop and stop-limit orders, indexed for per-tick matching.
+
+    Each ticker has two heaps of (key, order id): a max-heap of orders that fire when the
+    price falls to their key (buy limits, sell stops) and a min-heap of orders that fire when
+    it rises to their key (sell limits, buy stops). A tick only looks at the tops, so a price
+    that triggers nothing costs O(1) and each fill O(log n). Cancelled orders are left in the
+    heaps and skipped when they surface; the heaps are rebuilt once those outnumber the live
+    orders. A stop-limit whose stop is hit moves to its limit heap.
+
+    Not thread-safe: PaperTradingAccount calls it under its writer lock.
+    """
+
+    def __init__(self):
+        self.orders = {}     # id -> Order
+        self._heaps = {}     # ticker -> {'below': [(-key, id)], 'above': [(key, id)]}
+        self._counts = {}    # ticker -> live orders
+        self._stale = 0      # heap entries left behind by cancels
+        self.next_id = 1
+        self.version = 0     # bumped on every change, so the owner knows when to persist
+
+    def __len__(self):
+        return len(self.orders)
+
+    def tickers(self):
+        # Tickers with resting orders, i.e. the ones that need prices
+        return [t for t in self._counts]
+
+    def add(self, order):
+        if order.id is None:
+            order = order._replace(id=self.next_id)
+        self.next_id = max(self.next_id, order.id + 1)
+        self.orders[order.id] = order
+        self._counts[order.ticker] = self._counts.get(order.ticker, 0) + 1
+        self._push(order)
+        self.version += 1
+        return order
+
+    def cancel(self, order_id):
+        order = self.orders.get(order_id)
+        if order is None:
+            return None
+        self._drop(order)
+        self._stale += 1
+        self.version += 1
+        self._maybe_rebuild()
+        return order
+
+    def load(self, orders):
+        self.orders, self._heaps, self._counts, self._stale = {}, {}, {}, 0
+        for order in orders:
+            self.add(order)
+
+    def match(self, ticker, price):
+        # Orders on ticker that fire at price, removed from the book, in trigger order.
+        # Stop-limits whose stop is hit stay resting on their limit unless that is hit too.
+        heaps = self._heaps.get(ticker)
+        if heaps is None:
+            return []
+        below, above = heaps['below'], heaps['above']
+        fired = []
+        while (below and -below[0][0] >= price) or (above and above[0][0] <= price):
+            if below and -below[0][0] >= price:
+                key, order_id = heapq.heappop(below)
+                entry = ('below', -key)
+            else:
+                key, order_id = heapq.heappop(above)
+                entry = ('above', key)
+            order = self.orders.get(order_id)
+            if order is None or trigger(order) != entry:
+                self._stale -= 1
+                continue
+            if order.kind == 'stoplimit' and not order.triggered:
+                order = self.orders[order_id] = order._replace(triggered=True)
+                self._push(order)
+                self.version += 1
+                continue
+            self._drop(order)
+            self.version += 1
+            fired.append(order)
+        return fired
+
+    def _push(self, order):
+        heaps = self._heaps.setdefault(order.ticker, {'below': [], 'above': []})
+        side, key = trigger(order)
+        heapq.heappush(heaps[side], (-key if side == 'below' else key, order.id))
+
+    def _drop(self, order):
+        del self.orders[order.id]
+        count = self._counts[order.ticker] - 1
+        if count:
+            self._counts[order.ticker] = count
+        else:
+            del self._counts[order.ticker]
+
+    def _maybe_rebuild(self):
+        if self._stale > max(64, len(self.orders)):
+            self.load(sorted(self.orders.values()))
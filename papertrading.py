@@ -1,10 +1,30 @@
-import numpy as np
-import pandas as pd
-import matplotlib.pyplot as plt
-import yfinance as yf
+import csv
 import datetime
-from tabulate import tabulate
+from collections import namedtuple
 import os
+import threading
+from contextlib import contextmanager
+from lazy import lazy_import
+from pricecache import price_cache, prev_close_cache
+from marketdata import get_provider
+from barstore import get_bar_store
+from positionbook import PositionBook
+from orders import Order, OrderBook, ORDER_KINDS, describe
+from storage import open_storage, STARTING_CASH
+from autosave import Autosaver, DEBOUNCE
+from metrics import span, format_stats
+from singleflight import SingleFlight
+from valuation import value_positions, fmt_dollars, fmt_value, fmt_pct, position_types
+
+# Heavy dependencies load on first use so the prompt comes up without them
+np = lazy_import('numpy')
+pd = lazy_import('pandas')
+plt = lazy_import('matplotlib.pyplot')
+
+
+def tabulate(*args, **kwargs):
+    from tabulate import tabulate
+    return tabulate(*args, **kwargs)
 
 Cash = 1000000
 Tickers = [] 
@@ -44,17 +64,92 @@ def load():
         Cash = 100000
         print("No data found. Starting with default values.")
 
-def price(ticker):
+# Concurrent requests for the same ticker (price thread, trades, quote/g/fa threads) share one fetch
+latest_flights = SingleFlight('latest price')
+prev_close_flights = SingleFlight('previous close')
+
+def fetch_price(ticker):
+    # Uncached fetch of the latest price from the active provider, raises on failure
+    def fetch():
+        with span('fetch.price'):
+            return get_provider().latest_price(ticker)
+    p = latest_flights.do(ticker, fetch)
+    if p is None:
+        # Joined a batched fetch that had no price for this ticker
+        raise ValueError(f"No price data found for {ticker}")
+    return p
+
+def _fetch_or_report(ticker):
     try:
-        tk   = yf.Ticker(ticker)
-        hist = tk.history(period='1d', interval='1m')
-        if hist.empty:
-            raise ValueError(f"No price data found for {ticker}")
-        return hist['Close'].iloc[-1]
+        return fetch_price(ticker)
     except Exception as e:
         print(f"Error getting price for {ticker}: {e}")
         return None
 
+def price(ticker):
+    return price_cache.get_or_fetch(ticker, _fetch_or_report)
+
+def fetch_info(ticker):
+    # Company profile from the active provider (uncached, one of the slowest calls)
+    with span('fetch.info'):
+        return get_provider().info(ticker)
+
+def fetch_statement(ticker, kind):
+    # Quarterly statement DataFrame, kind is one of marketdata.STATEMENTS
+    with span('fetch.statement'):
+        return get_provider().statement(ticker, kind)
+
+def fetch_prices(tickers):
+    # Uncached batched fetch (one request for all tickers), returns {ticker: price} for those with data
+    def fetch(missing):
+        with span('fetch.prices'):
+            return get_provider().latest_prices(missing)
+    return latest_flights.do_many(tickers, fetch)
+
+def cached_prices(tickers):
+    # Vectorized lookup aligned with tickers (NaN where unavailable). Cache hits are free,
+    # all misses share a single batched download.
+    out = np.full(len(tickers), np.nan)
+    missing = []
+    for i, ticker in enumerate(tickers):
+        p = price_cache.get(ticker)
+        if p is None:
+            missing.append(i)
+        else:
+            out[i] = p
+    if missing:
+        try:
+            fetched = fetch_prices([tickers[i] for i in missing])
+        except Exception:
+            fetched = {}
+        for i in missing:
+            p = fetched.get(tickers[i])
+            if p is not None:
+                price_cache.set(tickers[i], p)
+                out[i] = p
+    return out
+
+# One price observation, taken once per trade and reused for validation, fill, P/L and message.
+# timestamp is when the price was observed (earlier than the trade when it came from the cache).
+Quote = namedtuple('Quote', ['ticker', 'price', 'timestamp'])
+last_quote = None  # Quote of the last fill by the module-level functions
+
+def snapshot(ticker):
+    p, observed = price_cache.quote(ticker, _fetch_or_report)
+    return Quote(ticker, p, datetime.datetime.fromtimestamp(observed))
+
+def quote_note(q):
+    # Appended to fill messages so a stale price is visible
+    age = (datetime.datetime.now() - q.timestamp).total_seconds()
+    return f" (quote {q.timestamp:%H:%M:%S}, {age:.0f}s old)"
+
+def previous_closes(tickers):
+    # {ticker: previous session close or None}, fetched in one batch once per trading day
+    def fetch(missing):
+        with span('fetch.prev_closes'):
+            return get_provider().previous_closes(missing)
+    return prev_close_cache.get_many(tickers, lambda missing: prev_close_flights.do_many(missing, fetch))
+
 def format_amount(amount):
     # Format with commas, no decimal if .0
     if amount == int(amount):
@@ -63,8 +158,9 @@ def format_amount(amount):
         return f"${amount:,.2f}"
 
 def buy(ticker, amount):
-    global Cash, Tickers, Quantity, PurchasePrice
-    p = price(ticker)
+    global Cash, Tickers, Quantity, PurchasePrice, last_quote
+    q = snapshot(ticker)
+    p = q.price
     if p is None:
         return
     if Cash >= amount:
@@ -81,43 +177,56 @@ def buy(ticker, amount):
             Quantity.append(amount / p)
             PurchasePrice.append(p)
         Cash -= amount
-        list(f"Bought {format_amount(amount)} of {ticker} @ ${p}")
+        last_quote = q
+        list(f"Bought {format_amount(amount)} of {ticker} @ ${p}" + quote_note(q))
     else:
         print("Not enough cash")
 
 def sell(ticker, amount):
-    global Cash, Tickers, Quantity, PurchasePrice
+    global Cash, Tickers, Quantity, PurchasePrice, last_quote
     idx = Tickers.index(ticker) if ticker in Tickers else -1
-    if price(ticker) is None or idx == -1:
+    if idx == -1:
+        return
+    q = snapshot(ticker)
+    p = q.price
+    if p is None:
         return
-    if amount > price(ticker)*Quantity[idx]:
+    if amount > p*Quantity[idx]:
         print("Not enough shares")
-    elif amount == price(ticker)*Quantity[idx]:
+    elif amount == p*Quantity[idx]:
         Cash += amount
         Quantity.pop(idx)
         Tickers.pop(idx)
         PurchasePrice.pop(idx)
-        list(f"Sold {format_amount(amount)} of {ticker} @ ${price(ticker)}")
+        last_quote = q
+        list(f"Sold {format_amount(amount)} of {ticker} @ ${p}" + quote_note(q))
     else:
         Cash += amount
-        Quantity[idx] -= amount/price(ticker)
-        list(f"Sold {format_amount(amount)} of {ticker} @ ${price(ticker)}")
+        Quantity[idx] -= amount/p
+        last_quote = q
+        list(f"Sold {format_amount(amount)} of {ticker} @ ${p}" + quote_note(q))
 
 def sellall(ticker):
-    global Cash, Tickers, Quantity, PurchasePrice
+    global Cash, Tickers, Quantity, PurchasePrice, last_quote
     idx = Tickers.index(ticker) if ticker in Tickers else -1
-    if price(ticker) is None or idx == -1:
+    if idx == -1:
+        return
+    q = snapshot(ticker)
+    p = q.price
+    if p is None:
         return
-    amt = price(ticker)*Quantity[idx]
+    amt = p*Quantity[idx]
     Cash += amt
     Quantity.pop(idx)
     Tickers.pop(idx)
     PurchasePrice.pop(idx)
-    list(f"Sold all of {ticker} @ ${price(ticker)} for {format_amount(amt)}")
+    last_quote = q
+    list(f"Sold all of {ticker} @ ${p} for {format_amount(amt)}" + quote_note(q))
 
 def short(ticker, amount):
-    global Cash, Tickers, Quantity, PurchasePrice
-    p = price(ticker)
+    global Cash, Tickers, Quantity, PurchasePrice, last_quote
+    q = snapshot(ticker)
+    p = q.price
     if p is None:
         return
     # Short selling: open or increase a short position
@@ -139,11 +248,13 @@ def short(ticker, amount):
         Quantity.append(-amount / p)
         PurchasePrice.append(p)
     Cash += amount
-    list(f"Shorted {format_amount(amount)} of {ticker} @ ${p}")
+    last_quote = q
+    list(f"Shorted {format_amount(amount)} of {ticker} @ ${p}" + quote_note(q))
 
 def cover(ticker, amount):
-    global Cash, Tickers, Quantity, PurchasePrice
-    p = price(ticker)
+    global Cash, Tickers, Quantity, PurchasePrice, last_quote
+    q = snapshot(ticker)
+    p = q.price
     if p is None:
         return
     if ticker in Tickers:
@@ -159,11 +270,13 @@ def cover(ticker, amount):
                 Quantity.pop(idx)
                 Tickers.pop(idx)
                 PurchasePrice.pop(idx)
-                list(f"Covered {format_amount(amount)} of {ticker} @ ${p}")
+                last_quote = q
+                list(f"Covered {format_amount(amount)} of {ticker} @ ${p}" + quote_note(q))
             else:
                 Cash -= amount
                 Quantity[idx] += shares_to_cover
-                list(f"Covered {format_amount(amount)} of {ticker} @ ${p}")
+                last_quote = q
+                list(f"Covered {format_amount(amount)} of {ticker} @ ${p}" + quote_note(q))
         else:
             print("You do not have a short position in this ticker.")
     else:
@@ -180,45 +293,16 @@ def list(message=None):
     if not Tickers:
         print("No Positions")
     else:
-        prices = []
-        values = []
-        pl_dollars = []
-        pl_percent = []
-        pos_type = []
-        qtys = []
-        for ticker, qty, buy_price in zip(Tickers, Quantity, PurchasePrice):
-            p = price(ticker)
-            qtys.append(qty)
-            if p is None:
-                prices.append("N/A")
-                values.append("N/A")
-                pl_dollars.append("N/A")
-                pl_percent.append("N/A")
-                pos_type.append("")
-            else:
-                prices.append(f"${p:,.2f}")
-                value = p * abs(qty)
-                if qty > 0:
-                    values.append(f"${value:,.2f}")
-                    pl = value - (buy_price * qty)
-                    pl_pct = (pl / (buy_price * qty)) * 100
-                    pos_type.append(f"{green}LONG{reset}")
-                elif qty < 0:
-                    values.append(f"-${value:,.2f}")
-                    pl = (buy_price - p) * abs(qty)
-                    pl_pct = (pl / (buy_price * abs(qty))) * 100 if buy_price != 0 else 0
-                    pos_type.append(f"{red}SHORT{reset}")
-                else:
-                    values.append(f"${value:,.2f}")
-                    pl = 0
-                    pl_pct = 0
-                    pos_type.append("")
-                pl_dollars.append(f"${pl:,.2f}")
-                pl_percent.append(f"{pl_pct:.2f}%")
+        v = value_positions(Quantity, PurchasePrice, cached_prices(Tickers))
+        prices = [fmt_dollars(x) for x in v.price]
+        values = [fmt_value(x) for x in v.value]
+        pl_dollars = [fmt_dollars(x) for x in v.pl]
+        pl_percent = [fmt_pct(x) for x in v.pl_pct]
+        pos_type = position_types(v, f"{green}LONG{reset}", f"{red}SHORT{reset}")
         df = pd.DataFrame({
             "Ticker": Tickers,
             "Type": pos_type,
-            "Quantity": qtys,
+            "Quantity": Quantity,
             "Price": prices,
             "Value": values,
             "P/L($)": pl_dollars,
@@ -236,12 +320,10 @@ def quote(ticker):
     print(f"Price: ${p:,.2f}")
     # Daily Change
     try:
-        tk = yf.Ticker(ticker)
-        hist = tk.history(period="2d")
-        if len(hist) < 2:
+        prev_close = previous_closes([ticker])[ticker]
+        if prev_close is None:
             print("(No previous close data)")
         else:
-            prev_close = hist['Close'].iloc[-2]
             change = p - prev_close
             percent_change = (change / prev_close) * 100
             print(f"Daily Change: ${change:+.2f} ({percent_change:+.2f}%)")
@@ -249,8 +331,7 @@ def quote(ticker):
         print(f"(Error getting daily change: {e})")
     # YTD Change
     try:
-        tk = yf.Ticker(ticker)
-        ytd_hist = tk.history(period="ytd")
+        ytd_hist = get_bar_store().history(ticker, period="ytd")
         if not ytd_hist.empty:
             ytd_start_price = ytd_hist['Close'].iloc[0]
             ytd_change = p - ytd_start_price
@@ -262,8 +343,7 @@ def quote(ticker):
         print(f"(Error getting YTD change: {e})")
     # Volume
     try:
-        tk = yf.Ticker(ticker)
-        hist = tk.history(period="2d")
+        hist = get_bar_store().history(ticker, period="2d")
         if hist.empty:
             print(f"No data found for {ticker}")
         else:
@@ -274,8 +354,7 @@ def quote(ticker):
 
 def plot_yearly(ticker):
     try:
-        tk = yf.Ticker(ticker)
-        hist = tk.history(period="1y")
+        hist = get_bar_store().history(ticker, period="1y")
         if hist.empty:
             print(f"No data found for {ticker}")
             return
@@ -293,8 +372,7 @@ def plot_yearly(ticker):
 
 def description(ticker):
     try:
-        tk = yf.Ticker(ticker)
-        info = tk.info
+        info = fetch_info(ticker)
         desc = info.get("longBusinessSummary") or info.get("shortBusinessSummary")
         if desc:
             print(desc)
@@ -306,7 +384,6 @@ def description(ticker):
 def show_financials(ticker):
     import re
     try:
-        tk = yf.Ticker(ticker)
         # Define key metrics for each statement
         income_keys = [
             'Total Revenue', 'Operating Revenue', 'Gross Profit', 'Operating Income', 'Net Income',
@@ -352,7 +429,7 @@ def show_financials(ticker):
             df.index.name = None
             return df
         # Income Statement (Quarterly)
-        financials = tk.quarterly_financials
+        financials = fetch_statement(ticker, 'financials')
         if not financials.empty:
             available_keys = [k for k in income_keys if k in financials.index]
             if available_keys:
@@ -364,7 +441,7 @@ def show_financials(ticker):
         else:
             print("No income statement data available.")
         # Balance Sheet (Quarterly)
-        balance = tk.quarterly_balance_sheet
+        balance = fetch_statement(ticker, 'balance_sheet')
         if not balance.empty:
             available_keys = [k for k in balance_keys if k in balance.index]
             if available_keys:
@@ -376,7 +453,7 @@ def show_financials(ticker):
         else:
             print("No balance sheet data available.")
         # Cash Flow (Quarterly)
-        cashflow = tk.quarterly_cashflow
+        cashflow = fetch_statement(ticker, 'cashflow')
         if not cashflow.empty:
             available_keys = [k for k in cashflow_keys if k in cashflow.index]
             if available_keys:
@@ -390,22 +467,44 @@ def show_financials(ticker):
     except Exception as e:
         print(f"Error fetching financials for {ticker}: {e}")
 
+HELP = """Commands:
+  buy (ticker) (amount)
+  sell (ticker) (amount)
+  sellall (ticker)
+  short (ticker) (amount)
+  cover (ticker) (amount)
+  basket (orders or file.csv)
+  limit (op) (ticker) (amount) (limit)
+  stop (op) (ticker) (amount) (stop)
+  stoplimit (op) (ticker) (amount) (stop) (limit)
+  orders
+  cancel (order number)
+  q (ticker)
+  g (ticker)
+  des (ticker)
+  fa (ticker)
+  stats
+  save
+  load
+  list
+  help
+  exit
+Examples:
+  buy AAPL 50k
+  sell TSLA 10k
+  short MSFT 100k
+  cover MSFT 50k
+  basket buy AAPL 50k, sellall TSLA
+  limit buy AAPL 50k 180
+  stop sellall TSLA 150
+  q AAPL
+  g TSLA
+  des MSFT
+  fa AAPL
+"""
+
 def help():
-    print("Welcome to SW paper trading system, here are the commands:")
-    print("BUY (ticker) (amount) - Buy a specific amount of a ticker")
-    print("SELL (ticker) (amount) - Sell a specific amount of a ticker")
-    print("SELLALL (ticker) - Sell all of a ticker")
-    print("SHORT (ticker) (amount) - Short sell a specific amount of a ticker")
-    print("COVER (ticker) (amount) - Cover a specific amount of a short position")
-    print("LIST - List all positions")
-    print("SAVE - Save the current positions and cash to a file")
-    print("LOAD - Load the positions and cash from a file")
-    print("Q (ticker) - Get current price for a ticker")
-    print("G (ticker) - Show a graph of the last year's price for a ticker")
-    print("DES (ticker) - Show a description of a ticker")
-    print("FA (ticker) - Show financial statement data for a ticker (quarterly)")
-    print("EXIT - Exit the program")
-    print("HELP - Show this help message")
+    print(HELP)
 
 TICKER_ALIASES = {
     'WTI': 'CL=F',
@@ -427,202 +526,510 @@ def parse_amount(s):
     else:
         return float(s)
 
+TRADE_OPS = ('buy', 'sell', 'sellall', 'short', 'cover')
+
+def trade_rules(op, ticker, pos, cash, p, amount=None):
+    """The trading rules for one order, without side effects.
+
+    pos is the current (quantity, average cost) or None, p the fill price (None if unknown).
+    Returns (False, message) when the order is refused, else (True, (qty, cost, cash,
+    realized_pl_delta, amount)) with the resulting position (qty 0 closes it), balance and
+    the dollar amount filled.
+    """
+    if op == 'buy':
+        if p is None:
+            return False, f"No price data for {ticker}"
+        if cash < amount:
+            return False, "Not enough cash"
+        if pos is not None:
+            old_qty, old_cost = pos
+            new_qty = old_qty + (amount / p)
+            return True, (new_qty, (old_qty * old_cost + (amount / p) * p) / new_qty, cash - amount, 0.0, amount)
+        return True, (amount / p, p, cash - amount, 0.0, amount)
+    if op in ('sell', 'sellall'):
+        if p is None or pos is None:
+            return False, f"No position or price for {ticker}"
+        qty, buy_price = pos
+        if op == 'sellall':
+            amount = p * qty
+        if amount > p * qty:
+            return False, "Not enough shares"
+        if amount == p * qty:
+            # Realized P/L for full close
+            return True, (0.0, 0.0, cash + amount, (p - buy_price) * qty, amount)
+        # Partial sell: realize P/L on sold shares
+        shares_sold = amount / p
+        return True, (qty - shares_sold, buy_price, cash + amount, (p - buy_price) * shares_sold, amount)
+    if op == 'short':
+        if p is None:
+            return False, f"No price data for {ticker}"
+        if pos is None:
+            return True, (-amount / p, p, cash + amount, 0.0, amount)
+        qty, cost = pos
+        if qty > 0:
+            return False, "You must close your long position before shorting."
+        total_shares = abs(qty) + (amount / p)
+        avg_price = (abs(qty) * cost + (amount / p) * p) / total_shares
+        return True, (qty - amount / p, avg_price, cash + amount, 0.0, amount)
+    if op == 'cover':
+        if p is None:
+            return False, f"No price data for {ticker}"
+        if pos is None or pos[0] >= 0:
+            return False, "You do not have a short position in this ticker."
+        qty, buy_price = pos
+        shares_to_cover = amount / p
+        if abs(qty) < shares_to_cover:
+            return False, "Not enough shorted shares to cover that amount."
+        if abs(qty) == shares_to_cover:
+            # Realized P/L for full cover
+            return True, (0.0, 0.0, cash - amount, (buy_price - p) * abs(qty), amount)
+        # Partial cover: realize P/L on covered shares
+        return True, (qty + shares_to_cover, buy_price, cash - amount, (buy_price - p) * shares_to_cover, amount)
+    return False, f"Unknown order type {op}"
+
+def fill_message(op, q, amount):
+    ticker, p = q.ticker, q.price
+    if op == 'buy':
+        return f"Bought {format_amount(amount)} of {ticker} @ ${p}" + quote_note(q)
+    if op == 'sell':
+        return f"Sold {format_amount(amount)} of {ticker} @ ${p}" + quote_note(q)
+    if op == 'sellall':
+        return f"Sold all of {ticker} @ ${p} for {format_amount(amount)}" + quote_note(q)
+    if op == 'short':
+        return f"Shorted {format_amount(amount)} of {ticker} @ ${p}" + quote_note(q)
+    return f"Covered {format_amount(amount)} of {ticker} @ ${p}" + quote_note(q)
+
+def parse_basket(text):
+    """Orders from text like 'buy AAPL 10k, sell 5k MSFT; sellall TSLA'.
+
+    Orders are separated by ',' or ';' and take the ticker and amount in either order.
+    Returns [(op, ticker, amount)] with amount None for sellall.
+    """
+    rows = []
+    for part in text.replace(';', ',').split(','):
+        words = part.split()
+        if not words:
+            continue
+        if len(words) not in (2, 3):
+            raise ValueError(f"Can't read order '{part.strip()}'")
+        rows.append((words[0], words[1], words[2] if len(words) == 3 else ''))
+    return _basket_orders(rows)
+
+def load_basket(path):
+    # Orders from a CSV file with op,ticker,amount columns (amount may be empty for sellall)
+    with open(path, newline='') as f:
+        return _basket_orders([(r['op'], r['ticker'], r.get('amount') or '') for r in csv.DictReader(f)])
+
+def parse_order(words):
+    """Resting order from the words of 'limit buy AAPL 10k 150', 'stop sellall TSLA 180' or
+    'stoplimit sell MSFT 5k 300 295' (stop, then limit); ticker and amount go in either order.
+    Returns (op, ticker, amount, kind, limit, stop)."""
+    kind = words[0].lower()
+    n_prices = 2 if kind == 'stoplimit' else 1
+    if kind not in ORDER_KINDS or len(words) < 2:
+        raise ValueError("Usage: limit|stop|stoplimit (op) (ticker) (amount) (price) [limit price]")
+    op = words[1].lower()
+    rest = words[2:]
+    if len(rest) != (1 if op == 'sellall' else 2) + n_prices:
+        raise ValueError("Usage: limit|stop|stoplimit (op) (ticker) (amount) (price) [limit price]")
+    prices = [float(w.lstrip('$').replace(',', '')) for w in rest[-n_prices:]]
+    (op, ticker, amount), = _basket_orders([(op, rest[0], '' if op == 'sellall' else rest[1])])
+    if kind == 'limit':
+        return op, ticker, amount, kind, prices[0], None
+    if kind == 'stop':
+        return op, ticker, amount, kind, None, prices[0]
+    return op, ticker, amount, kind, prices[1], prices[0]
+
+def _basket_orders(rows):
+    orders = []
+    for op, a, b in rows:
+        op, a, b = op.strip().lower(), a.strip(), b.strip()
+        if op not in TRADE_OPS:
+            raise ValueError(f"Unknown order type {op}")
+        if op == 'sellall':
+            orders.append((op, resolve_ticker(a), None))
+            continue
+        if not b:
+            raise ValueError(f"Missing amount for {op} {a}")
+        if any(c.isdigit() for c in a) and not any(c.isdigit() for c in b):
+            a, b = b, a
+        orders.append((op, resolve_ticker(a), parse_amount(b)))
+    return orders
+
 class PaperTradingAccount:
-    def __init__(self, portfolio_id=None):
+    def __init__(self, portfolio_id=None, storage=None, autosave=None):
         self.portfolio_id = portfolio_id
         self.is_new_portfolio = False
-        if portfolio_id and portfolio_id != 1:
-            self.positions_file = f'positions_{portfolio_id}.csv'
-            self.cash_file = f'cash_{portfolio_id}.csv'
-        else:
-            self.positions_file = 'positions.csv'
-            self.cash_file = 'cash.csv'
-        self.Cash = 100000
-        self.Tickers = []
-        self.Quantity = []
-        self.PurchasePrice = []
-        self.realized_pl = 0.0
+        # CSV snapshot + journal by default, SQLite with storage='sqlite' or PT_STORAGE=sqlite
+        if storage is None or isinstance(storage, str):
+            storage = open_storage(portfolio_id, storage)
+        self.storage = storage
+        self.book = PositionBook()
+        self.book.set_balance(STARTING_CASH, 0.0)
+        self.last_quote = None
+        # Dirty tracking: tickers whose position changed and whether cash/realized P/L changed
+        self.dirty = False
+        self.changes = {'positions': set(), 'cash': False}
+        self._save_lock = threading.Lock()
+        # Writers (trades, load) are serialized by _lock; readers use the published positions
+        # snapshot and never take it. Lock order when both are needed: _save_lock, then _lock.
+        self._lock = threading.RLock()
+        self._compact_due = False
+        self.orders = OrderBook()  # Resting limit/stop orders, changed under _lock
+        self._orders_saved = self.orders.version  # OrderBook version last written to storage
+        self.autosaver = Autosaver(self.save, delay=autosave) if autosave else None
+
+    @property
+    def positions(self):
+        # Immutable snapshot (positionbook.Positions) of every open position; take it once and
+        # use its aligned tickers/quantities/costs rather than reading the list views separately
+        return self.book.positions
+
+    # Balances as the writer sees them (under _lock); readers use positions.cash/realized_pl
+    @property
+    def Cash(self):
+        return self.book.cash
+
+    @property
+    def realized_pl(self):
+        return self.book.realized_pl
+
+    # Read-only list views kept for callers written against the old parallel lists
+    @property
+    def Tickers(self):
+        return [t for t in self.book.positions.tickers]
+
+    @property
+    def Quantity(self):
+        return self.book.positions.quantities.tolist()
+
+    @property
+    def PurchasePrice(self):
+        return self.book.positions.costs.tolist()
+
+    def state(self):
+        with self._lock:
+            positions = self.book.positions
+            return {
+                'tickers': [t for t in positions.tickers],
+                'qtys': positions.quantities.tolist(),
+                'costs': positions.costs.tolist(),
+                'cash': self.Cash,
+                'realized_pl': self.realized_pl,
+            }
+
+    @contextmanager
+    def _writing(self):
+        # Writer section for a trade; a snapshot that fell due during it is handed to the
+        # autosaver once the lock is released, so compaction never runs on the trading thread
+        with self._lock:
+            yield
+            compact, self._compact_due = self._compact_due, False
+        if compact:
+            self.save_async()
 
     def save(self):
-        df = pd.DataFrame({
-            'Ticker': self.Tickers,
-            'Quantity': self.Quantity,
-            'PurchasePrice': self.PurchasePrice
-        })
-        df.to_csv(self.positions_file, index=False)
-        pd.DataFrame({'Cash': [self.Cash], 'RealizedPL': [self.realized_pl]}).to_csv(self.cash_file, index=False)
+        # Writes only when something changed since the last save; returns whether it wrote
+        with self._save_lock:
+            with self._lock:
+                dirty = self.dirty
+                if dirty:
+                    changes = self.changes
+                    self.changes = {'positions': set(), 'cash': False}
+                    self.dirty = False
+                    checkpoint = self.storage.checkpoint()
+                    state = self.state()
+            if dirty:
+                try:
+                    with span('storage.save'):
+                        self.storage.save(state, changes, checkpoint)
+                except Exception:
+                    with self._lock:
+                        self._mark_dirty(changes['positions'], changes['cash'], notify=False)
+                    raise
+            return self._save_orders() or dirty
+
+    def save_async(self):
+        # Persist without blocking the caller (falls back to a synchronous save without an autosaver)
+        if self.autosaver is not None:
+            self.autosaver.save_soon()
+        else:
+            self.save()
+
+    def close(self):
+        # Flush pending changes before exit
+        if self.autosaver is not None:
+            self.autosaver.flush()
+        else:
+            self.save()
+
+    def _mark_dirty(self, tickers=(), cash=True, notify=True):
+        self.changes['positions'].update(tickers)
+        self.changes['cash'] = self.changes['cash'] or cash
+        self.dirty = True
+        if notify and self.autosaver is not None:
+            self.autosaver.notify()
 
     def load(self):
-        try:
-            df = pd.read_csv(self.positions_file)
-            self.Tickers = df['Ticker'].tolist()
-            self.Quantity = df['Quantity'].tolist()
-            if 'PurchasePrice' in df.columns:
-                self.PurchasePrice = df['PurchasePrice'].tolist()
-            else:
-                self.PurchasePrice = [0.0] * len(self.Tickers)
-            df = pd.read_csv(self.cash_file)
-            self.Cash = float(df.loc[0, 'Cash'])
-            if 'RealizedPL' in df.columns:
-                self.realized_pl = float(df.loc[0, 'RealizedPL'])
-            else:
-                self.realized_pl = 0.0
-            self.is_new_portfolio = False
-        except FileNotFoundError:
-            self.Tickers = []
-            self.Quantity = []
-            self.PurchasePrice = []
-            self.Cash = 100000
-            self.realized_pl = 0.0
+        with self._lock:
+            self._load()
+
+    def _load(self):
+        with span('storage.load'):
+            state = self.storage.load()
+        self.changes = {'positions': set(), 'cash': False}
+        self.dirty = False
+        if state is None:
+            with self.book.batch():
+                self.book.clear()
+                self.book.set_balance(STARTING_CASH, 0.0)
             self.is_new_portfolio = True
+            # Nothing on disk yet, so the starting balance is unsaved
+            self._mark_dirty(notify=False)
+        else:
+            with self.book.batch():
+                self.book.load(state['tickers'], state['qtys'], state['costs'])
+                self.book.set_balance(state['cash'], state['realized_pl'])
+            self.is_new_portfolio = False
+        self.orders.load([Order(*row) for row in self.storage.load_orders()])
+        self._orders_saved = self.orders.version
+
+    def _fill(self, op, ticker, q, result):
+        # Apply a trade_rules() result and persist it (one journal line or one SQLite transaction).
+        # Caller holds the writer lock.
+        self._apply(ticker, result)
+        self.last_quote = q
+        self._mark_dirty([ticker])
+        with span('storage.fill'):
+            compact = self.storage.record_fill(self._fill_record(op, ticker, q, result))
+        self._compact_due = self._compact_due or compact
+
+    def _apply(self, ticker, result):
+        qty, cost, cash, realized, _ = result
+        # One published snapshot with the new position and balances
+        with self.book.batch():
+            if qty == 0:
+                self.book.remove(ticker)
+            else:
+                self.book.set(ticker, qty, cost)
+            self.book.set_balance(cash, self.book.realized_pl + realized)
+
+    def _fill_record(self, op, ticker, q, result):
+        # The resulting position and balances, so replaying the journal is just assignment
+        qty, cost, _, _, amount = result
+        return {
+            'ts': q.timestamp.isoformat(), 'op': op, 'ticker': ticker, 'price': float(q.price),
+            'amount': float(amount), 'qty': float(qty), 'cost': float(cost) if qty else 0.0,
+            'cash': float(self.Cash), 'realized_pl': float(self.realized_pl),
+        }
 
     def price(self, ticker):
+        # Served from the shared TTL cache, only hits the network on a miss
+        return price_cache.get_or_fetch(ticker, self._fetch_price)
+
+    def _fetch_price(self, ticker):
         try:
-            tk = yf.Ticker(ticker)
-            hist = tk.history(period='1d', interval='1m')
-            if hist.empty:
-                raise ValueError(f"No price data found for {ticker}")
-            return hist['Close'].iloc[-1]
-        except Exception as e:
+            return fetch_price(ticker)
+        except Exception:
             return None
 
+    def prices(self, tickers):
+        # Batched version of price(): returns a float array aligned with tickers, NaN where unavailable
+        return cached_prices(tickers)
+
+    def snapshot(self, ticker):
+        # Single quote for a whole trade, stamped with when its price was observed; the
+        # successful fill's quote is kept in last_quote and its time goes into the fill record
+        p, observed = price_cache.quote(ticker, self._fetch_price)
+        return Quote(ticker, p, datetime.datetime.fromtimestamp(observed))
+
+    def previous_closes(self, tickers):
+        return previous_closes(tickers)
+
+    def valuation(self, prices, prev_closes=None, positions=None):
+        # prices (and prev_closes) aligned with positions.tickers, by default the current
+        # snapshot; see valuation.value_positions
+        if positions is None:
+            positions = self.book.positions
+        return value_positions(positions.quantities, positions.costs, prices, prev_closes)
+
+    def _trade(self, op, ticker, amount=None, q=None):
+        q = q or self.snapshot(ticker)
+        with self._writing():
+            ok, result = trade_rules(op, ticker, self.book.get(ticker), self.Cash, q.price, amount)
+            if not ok:
+                return False, result
+            self._fill(op, ticker, q, result)
+        return True, fill_message(op, q, result[4])
+
     def buy(self, ticker, amount):
-        p = self.price(ticker)
-        if p is None:
-            return False, f"No price data for {ticker}"
-        if self.Cash >= amount:
-            if ticker in self.Tickers:
-                idx = self.Tickers.index(ticker)
-                old_qty = self.Quantity[idx]
-                new_qty = old_qty + (amount / p)
-                avg_price = (old_qty * self.PurchasePrice[idx] + (amount / p) * p) / new_qty
-                self.Quantity[idx] = new_qty
-                self.PurchasePrice[idx] = avg_price
-            else:
-                self.Tickers.append(ticker)
-                self.Quantity.append(amount / p)
-                self.PurchasePrice.append(p)
-            self.Cash -= amount
-            return True, f"Bought {format_amount(amount)} of {ticker} @ ${p}"
-        else:
-            return False, "Not enough cash"
+        return self._trade('buy', ticker, amount)
 
     def sell(self, ticker, amount):
-        idx = self.Tickers.index(ticker) if ticker in self.Tickers else -1
-        p = self.price(ticker)
-        if p is None or idx == -1:
-            return False, f"No position or price for {ticker}"
-        if amount > p * self.Quantity[idx]:
-            return False, "Not enough shares"
-        elif amount == p * self.Quantity[idx]:
-            # Realized P/L for full close
-            buy_price = self.PurchasePrice[idx]
-            qty = self.Quantity[idx]
-            pl = (p - buy_price) * qty
-            self.realized_pl += pl
-            self.Cash += amount
-            self.Quantity.pop(idx)
-            self.Tickers.pop(idx)
-            self.PurchasePrice.pop(idx)
-            return True, f"Sold {format_amount(amount)} of {ticker} @ ${p}"
-        else:
-            # Partial sell: realize P/L on sold shares
-            buy_price = self.PurchasePrice[idx]
-            shares_sold = amount / p
-            pl = (p - buy_price) * shares_sold
-            self.realized_pl += pl
-            self.Cash += amount
-            self.Quantity[idx] -= shares_sold
-            return True, f"Sold {format_amount(amount)} of {ticker} @ ${p}"
+        return self._trade('sell', ticker, amount)
 
     def sellall(self, ticker):
-        idx = self.Tickers.index(ticker) if ticker in self.Tickers else -1
-        p = self.price(ticker)
-        if p is None or idx == -1:
-            return False, f"No position or price for {ticker}"
-        qty = self.Quantity[idx]
-        buy_price = self.PurchasePrice[idx]
-        pl = (p - buy_price) * qty
-        self.realized_pl += pl
-        amt = p * qty
-        self.Cash += amt
-        self.Quantity.pop(idx)
-        self.Tickers.pop(idx)
-        self.PurchasePrice.pop(idx)
-        return True, f"Sold all of {ticker} @ ${p} for {format_amount(amt)}"
+        return self._trade('sellall', ticker)
 
     def short(self, ticker, amount):
-        p = self.price(ticker)
-        if p is None:
-            return False, f"No price data for {ticker}"
-        if ticker in self.Tickers:
-            idx = self.Tickers.index(ticker)
-            if self.Quantity[idx] < 0:
-                total_shares = abs(self.Quantity[idx]) + (amount / p)
-                avg_price = (abs(self.Quantity[idx]) * self.PurchasePrice[idx] + (amount / p) * p) / total_shares
-                self.Quantity[idx] -= amount / p
-                self.PurchasePrice[idx] = avg_price
-            elif self.Quantity[idx] > 0:
-                return False, "You must close your long position before shorting."
-        else:
-            self.Tickers.append(ticker)
-            self.Quantity.append(-amount / p)
-            self.PurchasePrice.append(p)
-        self.Cash += amount
-        return True, f"Shorted {format_amount(amount)} of {ticker} @ ${p}"
+        return self._trade('short', ticker, amount)
 
     def cover(self, ticker, amount):
-        p = self.price(ticker)
-        if p is None:
-            return False, f"No price data for {ticker}"
-        if ticker in self.Tickers:
-            idx = self.Tickers.index(ticker)
-            if self.Quantity[idx] < 0:
-                shares_to_cover = amount / p
-                if abs(self.Quantity[idx]) < shares_to_cover:
-                    return False, "Not enough shorted shares to cover that amount."
-                if abs(self.Quantity[idx]) == shares_to_cover:
-                    # Realized P/L for full cover
-                    buy_price = self.PurchasePrice[idx]
-                    qty = abs(self.Quantity[idx])
-                    pl = (buy_price - p) * qty
-                    self.realized_pl += pl
-                    self.Cash -= amount
-                    self.Quantity.pop(idx)
-                    self.Tickers.pop(idx)
-                    self.PurchasePrice.pop(idx)
-                    return True, f"Covered {format_amount(amount)} of {ticker} @ ${p}"
-                else:
-                    # Partial cover: realize P/L on covered shares
-                    buy_price = self.PurchasePrice[idx]
-                    pl = (buy_price - p) * shares_to_cover
-                    self.realized_pl += pl
-                    self.Cash -= amount
-                    self.Quantity[idx] += shares_to_cover
-                    return True, f"Covered {format_amount(amount)} of {ticker} @ ${p}"
-            else:
-                return False, "You do not have a short position in this ticker."
+        return self._trade('cover', ticker, amount)
+
+    def execute_batch(self, orders):
+        """Trade a basket of (op, ticker, amount) orders as one unit; amount is ignored for sellall.
+
+        Prices for every ticker come from one batched fetch. The whole basket is checked in order
+        against the current positions and cash before anything changes, then either every order
+        fills or none does: one published positions snapshot, one journal write (or one SQLite
+        transaction). Returns (ok, messages).
+        """
+        orders = [(op.lower(), ticker, amount) for op, ticker, amount in orders]
+        if not orders:
+            return False, ["Basket is empty"]
+        unknown = [op for op, _, _ in orders if op not in TRADE_OPS]
+        if unknown:
+            return False, [f"Unknown order type {unknown[0]}"]
+        tickers = [t for t in dict.fromkeys(ticker for _, ticker, _ in orders)]
+        now = datetime.datetime.now()
+        quotes = {}
+        for t, p in zip(tickers, self.prices(tickers)):
+            observed = price_cache.observed(t)
+            quotes[t] = Quote(t, None if np.isnan(p) else float(p),
+                              now if observed is None else datetime.datetime.fromtimestamp(observed))
+        with self._writing():
+            cash = self.Cash
+            pending = {}  # ticker -> position after the orders planned so far
+            planned, errors = [], []
+            for n, (op, ticker, amount) in enumerate(orders, 1):
+                pos = pending[ticker] if ticker in pending else self.book.get(ticker)
+                ok, result = trade_rules(op, ticker, pos, cash, quotes[ticker].price, amount)
+                if not ok:
+                    errors.append(f"Order {n} ({op} {ticker}): {result}")
+                    continue
+                qty, cost, cash, _, _ = result
+                pending[ticker] = (qty, cost) if qty != 0 else None
+                planned.append((op, ticker, result))
+            if errors:
+                return False, errors + ["Basket rejected, nothing was traded."]
+            records = []
+            with self.book.batch():
+                for op, ticker, result in planned:
+                    self._apply(ticker, result)
+                    records.append(self._fill_record(op, ticker, quotes[ticker], result))
+            self.last_quote = quotes[planned[-1][1]]
+            self._mark_dirty(tickers)
+            with span('storage.fill'):
+                compact = self.storage.record_fills(records)
+            self._compact_due = self._compact_due or compact
+        return True, [fill_message(op, quotes[ticker], result[4]) for op, ticker, result in planned]
+
+    def place_order(self, op, ticker, amount, kind, limit=None, stop=None):
+        """Rest a limit, stop or stop-limit order until check_orders() sees a price that fires it.
+
+        Buy and cover limits fill at or below `limit` and their stops trigger at or above
+        `stop`; sell, sellall and short work the other way round. A stop-limit turns into a
+        limit order once its stop is hit. A fired order trades at the triggering price under
+        the usual rules, and is dropped with a message if it can no longer be filled.
+        """
+        if op not in TRADE_OPS:
+            return False, f"Unknown order type {op}"
+        if kind not in ORDER_KINDS:
+            return False, "Order kind must be limit, stop or stoplimit"
+        if kind != 'stop' and not limit:
+            return False, f"A {kind} order needs a limit price"
+        if kind != 'limit' and not stop:
+            return False, f"A {kind} order needs a stop price"
+        with self._lock:
+            order = self.orders.add(Order(None, op, ticker, kind, None if op == 'sellall' else amount,
+                                          limit if kind != 'stop' else None, stop if kind != 'limit' else None, False))
+        self._orders_changed()
+        return True, f"Placed order {describe(order)}"
+
+    def cancel_order(self, order_id):
+        with self._lock:
+            order = self.orders.cancel(order_id)
+        if order is None:
+            return False, f"No open order #{order_id}"
+        self._orders_changed()
+        return True, f"Cancelled order {describe(order)}"
+
+    def open_orders(self):
+        with self._lock:
+            return sorted(self.orders.orders.values())
+
+    def check_orders(self, prices):
+        # Fill the resting orders that prices ({ticker: price}, one poll or one tick) trigger.
+        # Returns [(ok, message)] for every order that fired.
+        if not self.orders:
+            return []
+        now = datetime.datetime.now()
+        with self._lock:
+            version = self.orders.version
+            fired = [(order, price) for ticker, price in prices.items() if price is not None and price == price
+                     for order in self.orders.match(ticker, price)]
+            changed = self.orders.version != version
+        results = []
+        for order, price in fired:
+            # Each fill takes the writer lock itself, so a compaction save can run in between
+            try:
+                ok, msg = self._trade(order.op, order.ticker, order.amount, Quote(order.ticker, float(price), now))
+            except Exception as e:
+                # A storage error on one fill must not lose the others' results
+                results.append((False, f"Order #{order.id} failed: {e!r}"))
+                continue
+            results.append((ok, f"Order #{order.id} filled: {msg}" if ok else f"Order #{order.id} dropped: {msg}"))
+        if changed:
+            self._orders_changed()
+        return results
+
+    def poll_orders(self):
+        # check_orders() against current prices for every ticker with resting orders (one batch fetch)
+        tickers = self.orders.tickers()
+        if not tickers:
+            return []
+        return self.check_orders(dict(zip(tickers, self.prices(tickers).tolist())))
+
+    def _orders_changed(self):
+        # Resting orders are written by save() like positions, so placing or cancelling one does
+        # no disk I/O on the caller's thread when there is an autosaver
+        if self.autosaver is not None:
+            self.autosaver.notify()
         else:
-            return False, "You do not have a short position in this ticker."
+            self.save()
+
+    def _save_orders(self):
+        # Caller holds _save_lock, so concurrent saves can only write newer sets last.
+        # Returns whether it wrote; on failure the version stays unsaved for the next save().
+        with self._lock:
+            version = self.orders.version
+            if version == self._orders_saved:
+                return False
+            rows = sorted(self.orders.orders.values())
+        self.storage.save_orders(rows)
+        self._orders_saved = version
+        return True
 
     def get_portfolio(self):
         # Returns a DataFrame for display
+        positions = self.book.positions
         return pd.DataFrame({
-            'Ticker': self.Tickers,
-            'Quantity': self.Quantity,
-            'PurchasePrice': self.PurchasePrice
+            'Ticker': [t for t in positions.tickers],
+            'Quantity': positions.quantities,
+            'PurchasePrice': positions.costs
         })
 
     def get_cash(self):
-        return self.Cash
+        return self.book.positions.cash
 
     def get_realized_pl(self):
-        return self.realized_pl
+        return self.book.positions.realized_pl
 
 # Remove global variables and top-level trading functions, and use the PaperTradingAccount class for all trading logic in main().
 
 if __name__ == "__main__":
-    account = PaperTradingAccount()
+    account = PaperTradingAccount(autosave=DEBOUNCE)
     account.load()
     print("Welcome to SW paper trading system!")
     while True:
@@ -670,6 +1077,36 @@ if __name__ == "__main__":
                 continue
             success, msg = account.cover(ticker, amount)
             print(msg)
+        elif cmd == "basket" and args:
+            # basket buy AAPL 50k, sell TSLA 10k   or   basket orders.csv (op,ticker,amount)
+            rest = " ".join(args)
+            try:
+                orders = load_basket(rest) if rest.lower().endswith(".csv") else parse_basket(rest)
+            except (ValueError, KeyError, OSError) as e:
+                print(f"↳ Can't read basket: {e}")
+                continue
+            success, msgs = account.execute_batch(orders)
+            print("\n".join(msgs))
+        elif cmd in ORDER_KINDS:
+            # limit buy AAPL 50k 150   stop sellall TSLA 180   stoplimit sell MSFT 10k 300 295
+            try:
+                op, ticker, amount, kind, limit, stop = parse_order(parts)
+            except ValueError as e:
+                print(f"↳ {e}")
+                continue
+            success, msg = account.place_order(op, ticker, amount, kind, limit, stop)
+            print(msg)
+        elif cmd == "orders":
+            orders = account.open_orders()
+            print("\n".join(describe(o) for o in orders) if orders else "No open orders")
+        elif cmd == "cancel" and len(args) == 1:
+            try:
+                order_id = int(args[0].lstrip("#"))
+            except ValueError:
+                print("↳ Usage: cancel (order number)")
+                continue
+            success, msg = account.cancel_order(order_id)
+            print(msg)
         elif cmd == "list":
             # Show portfolio with realized/unrealized P/L
             df = account.get_portfolio()
@@ -678,53 +1115,22 @@ if __name__ == "__main__":
                 print("No Positions")
             else:
                 print(f"Cash: ${account.get_cash():,.2f}")
-                tickers = account.Tickers
-                qtys = account.Quantity
-                prices = []
-                values = []
-                pl_dollars = []
-                pl_percent = []
-                pos_type = []
-                total_unrealized_pl = 0
-                total_invested = 0
-                for ticker, qty, buy_price in zip(tickers, qtys, account.PurchasePrice):
-                    p = account.price(ticker)
-                    if p is None:
-                        prices.append("N/A")
-                        values.append("N/A")
-                        pl_dollars.append("N/A")
-                        pl_percent.append("N/A")
-                        pos_type.append("")
-                    else:
-                        prices.append(f"${p:,.2f}")
-                        value = p * abs(qty)
-                        if qty > 0:
-                            values.append(f"${value:,.2f}")
-                            pl = value - (buy_price * qty)
-                            pl_pct = (pl / (buy_price * qty)) * 100
-                            total_unrealized_pl += pl
-                            total_invested += buy_price * qty
-                            pos_type.append("LONG")
-                        elif qty < 0:
-                            values.append(f"-${value:,.2f}")
-                            pl = (buy_price - p) * abs(qty)
-                            pl_pct = (pl / (buy_price * abs(qty))) * 100 if buy_price != 0 else 0
-                            total_unrealized_pl += pl
-                            total_invested += buy_price * abs(qty)
-                            pos_type.append("SHORT")
-                        else:
-                            values.append(f"${value:,.2f}")
-                            pl = 0
-                            pl_pct = 0
-                            pos_type.append("")
-                        pl_dollars.append(f"${pl:,.2f}")
-                        pl_percent.append(f"{pl_pct:.2f}%")
+                positions = account.positions
+                tickers = [t for t in positions.tickers]
+                qtys = positions.quantities.tolist()
+                v = account.valuation(account.prices(tickers), positions=positions)
+                prices = [fmt_dollars(x) for x in v.price]
+                values = [fmt_value(x) for x in v.value]
+                pl_dollars = [fmt_dollars(x) for x in v.pl]
+                pl_percent = [fmt_pct(x) for x in v.pl_pct]
+                pos_type = position_types(v)
+                total_unrealized_pl = v.total_unrealized_pl
                 import pandas as pd
                 df = pd.DataFrame({
                     "Ticker": tickers,
                     "Type": pos_type,
                     "Quantity": qtys,
-                    "Purchase Price": account.PurchasePrice,
+                    "Purchase Price": positions.costs.tolist(),
                     "Price": prices,
                     "Value": values,
                     "P/L($)": pl_dollars,
@@ -750,9 +1156,7 @@ if __name__ == "__main__":
                 print(f"Price: ${p:,.2f}")
         elif cmd == "g" and len(args) == 1:
             from matplotlib import pyplot as plt
-            import yfinance as yf
-            tkf = yf.Ticker(args[0].upper())
-            hist = tkf.history(period="1y")
+            hist = get_bar_store().history(args[0].upper(), period="1y")
             if hist.empty:
                 print(f"No data found for {args[0].upper()}")
             else:
@@ -766,23 +1170,24 @@ if __name__ == "__main__":
                 plt.tight_layout()
                 plt.show()
         elif cmd == "des" and len(args) == 1:
-            from yfinance import Ticker
-            tkf = Ticker(args[0].upper())
-            info = tkf.info
+            info = fetch_info(args[0].upper())
             desc = info.get("longBusinessSummary") or info.get("shortBusinessSummary")
             if desc:
                 print(desc)
             else:
                 print("No description available.")
         elif cmd == "fa" and len(args) == 1:
-            # (Omitted for brevity, can be copied from above)
-            pass
+            show_financials(args[0].upper())
+        elif cmd == "stats":
+            print(format_stats())
         elif cmd in ("exit", "quit"):
-            account.save()
+            account.close()
             print("Goodbye!")
             break
         elif cmd == "help":
-            # (Omitted for brevity, can be copied from above)
-            pass
+            print(HELP)
         else:
-            print("Unknown command or wrong args. Type 'help' for a list of commands.")
\ No newline at end of file
+            print("Unknown command or wrong args. Type 'help' for a list of commands.")
+        # No price thread here, so resting orders are checked against fresh prices after each command
+        for success, msg in account.poll_orders():
+            print(msg)
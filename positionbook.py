@@ -0,0 +1,181 @@
+from contextlib import contextmanager
+
+from lazy import lazy_import
+
+np = lazy_import('numpy')
+
+
+class Positions:
+    """Immutable view of a PositionBook at one point in time.
+
+    tickers, quantities and costs are aligned; the arrays are read-only copies, so a reader
+    (price thread, valuation worker) can keep using one while the book moves on. cash and
+    realized_pl are the account balances as of the same change.
+    """
+
+    __slots__ = ('tickers', 'quantities', 'costs', 'cash', 'realized_pl', '_index')
+
+    def __init__(self, tickers, quantities, costs, cash=0.0, realized_pl=0.0):
+        quantities.flags.writeable = False
+        costs.flags.writeable = False
+        self.tickers = tickers
+        self.quantities = quantities
+        self.costs = costs
+        self.cash = cash
+        self.realized_pl = realized_pl
+        self._index = None
+
+    def __len__(self):
+        return len(self.tickers)
+
+    def __contains__(self, ticker):
+        return ticker in self.tickers
+
+    def get(self, ticker):
+        # (quantity, average cost) or None, like PositionBook.get
+        if self._index is None:
+            self._index = {t: i for i, t in enumerate(self.tickers)}
+        i = self._index.get(ticker)
+        if i is None:
+            return None
+        return float(self.quantities[i]), float(self.costs[i])
+
+
+class PositionBook:
+    """Open positions stored column-wise.
+
+    Quantities and average costs live in contiguous NumPy arrays so valuation can run as
+    array math; a ticker -> slot dict gives O(1) lookups. Closing a position moves the last
+    slot into the hole (swap-remove), so slot order is not insertion order.
+
+    The account's cash and realized P/L are kept here too (set_balance), so they are published
+    together with the positions they belong to.
+
+    Only one thread may change the book at a time (PaperTradingAccount holds its writer lock).
+    After every change a new Positions snapshot is published by swapping one reference, so
+    readers on other threads use `positions` without locking.
+    """
+
+    def __init__(self, capacity=16):
+        self._index = {}    # ticker -> slot
+        self._tickers = []  # slot -> ticker
+        self._qty = np.zeros(capacity)
+        self._cost = np.zeros(capacity)
+        self.cash = 0.0
+        self.realized_pl = 0.0
+        self._batch = 0
+        self._unpublished = False
+        self._tickers_changed = False
+        self.positions = Positions((), np.zeros(0), np.zeros(0))
+
+    def __len__(self):
+        return len(self._tickers)
+
+    def __contains__(self, ticker):
+        return ticker in self._index
+
+    def slot(self, ticker):
+        return self._index.get(ticker, -1)
+
+    def get(self, ticker):
+        # (quantity, average cost) or None when there is no position
+        i = self._index.get(ticker)
+        if i is None:
+            return None
+        return float(self._qty[i]), float(self._cost[i])
+
+    def set(self, ticker, qty, cost):
+        # Open a position or overwrite an existing one
+        i = self._index.get(ticker)
+        opened = i is None
+        if opened:
+            i = len(self._tickers)
+            if i == len(self._qty):
+                self._grow()
+            self._index[ticker] = i
+            self._tickers.append(ticker)
+        self._qty[i] = qty
+        self._cost[i] = cost
+        self._changed(tickers=opened)
+
+    def set_balance(self, cash, realized_pl):
+        self.cash = cash
+        self.realized_pl = realized_pl
+        self._changed(tickers=False)
+
+    def remove(self, ticker):
+        i = self._index.pop(ticker)
+        last = len(self._tickers) - 1
+        if i != last:
+            moved = self._tickers[last]
+            self._tickers[i] = moved
+            self._qty[i] = self._qty[last]
+            self._cost[i] = self._cost[last]
+            self._index[moved] = i
+        self._tickers.pop()
+        self._qty[last] = 0.0
+        self._cost[last] = 0.0
+        self._changed()
+
+    def clear(self):
+        self._index.clear()
+        self._tickers.clear()
+        self._qty[:] = 0.0
+        self._cost[:] = 0.0
+        self._changed()
+
+    def load(self, tickers, qtys, costs):
+        self._index = {t: i for i, t in enumerate(tickers)}
+        self._tickers = [t for t in tickers]
+        n = len(self._tickers)
+        capacity = max(16, 1 << max(n - 1, 0).bit_length())
+        self._qty = np.zeros(capacity)
+        self._cost = np.zeros(capacity)
+        self._qty[:n] = qtys
+        self._cost[:n] = costs
+        self._changed()
+
+    @contextmanager
+    def batch(self):
+        # Publish one snapshot for a group of changes instead of one per change
+        self._batch += 1
+        try:
+            yield self
+        finally:
+            self._batch -= 1
+            if not self._batch and self._unpublished:
+                self._publish()
+
+    def _changed(self, tickers=True):
+        self._tickers_changed = self._tickers_changed or tickers
+        if self._batch:
+            self._unpublished = True
+        else:
+            self._publish()
+
+    def _publish(self):
+        # Copy-on-write: the arrays are copied, the ticker tuple only when the set of tickers changed
+        n = len(self._tickers)
+        tickers = tuple(self._tickers) if self._tickers_changed else self.positions.tickers
+        self.positions = Positions(tickers, self._qty[:n].copy(), self._cost[:n].copy(), self.cash, self.realized_pl)
+        self._unpublished = False
+        self._tickers_changed = False
+
+    def _grow(self):
+        capacity = len(self._qty) * 2
+        self._qty = np.resize(self._qty, capacity)
+        self._cost = np.resize(self._cost, capacity)
+        self._qty[len(self._tickers):] = 0.0
+        self._cost[len(self._tickers):] = 0.0
+
+    @property
+    def tickers(self):
+        return list(self.positions.tickers)
+
+    @property
+    def quantities(self):
+        return self.positions.quantities
+
+    @property
+    def costs(self):
+        return self.positions.costs
@@ -0,0 +1,160 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from scheduler import exchange_dates
+
+# Seconds a quote stays fresh (matches the GUI refresh interval), override with PT_PRICE_TTL
+DEFAULT_TTL = float(os.environ.get('PT_PRICE_TTL', 5.0))
+DEFAULT_MAXSIZE = 512
+# Seconds a ticker the source returned no previous close for waits before it is asked again
+NEGATIVE_TTL = 60.0
+
+
+class PriceCache:
+    """Thread-safe TTL + LRU cache of latest prices keyed by ticker."""
+
+    def __init__(self, ttl=DEFAULT_TTL, maxsize=DEFAULT_MAXSIZE):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._data = OrderedDict()  # ticker -> (price, stored_at, observed wall-clock time)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, ticker):
+        return self._get(ticker)[0]
+
+    def _get(self, ticker):
+        # (price, observed) or (None, None)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._data.get(ticker)
+            if entry is not None and now - entry[1] <= self.ttl:
+                self._data.move_to_end(ticker)
+                self.hits += 1
+                return entry[0], entry[2]
+            if entry is not None:
+                # Expired, drop it so it doesn't hold a slot
+                del self._data[ticker]
+            self.misses += 1
+            return None, None
+
+    def observed(self, ticker):
+        # Epoch seconds the cached price was seen, None if not cached; not counted as a lookup
+        with self._lock:
+            entry = self._data.get(ticker)
+            return None if entry is None else entry[2]
+
+    def set(self, ticker, price, observed=None):
+        # observed: epoch seconds the price was seen, default now
+        if price is None:
+            return
+        with self._lock:
+            self._data[ticker] = (price, time.monotonic(), time.time() if observed is None else observed)
+            self._data.move_to_end(ticker)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def get_or_fetch(self, ticker, fetch):
+        return self.quote(ticker, fetch)[0]
+
+    def quote(self, ticker, fetch):
+        # (price, epoch seconds it was observed); a cached price keeps its original time, so
+        # callers can tell how stale it is. The network fetch happens outside the lock so
+        # other tickers aren't blocked.
+        price, observed = self._get(ticker)
+        if price is not None:
+            return price, observed
+        observed = time.time()
+        price = fetch(ticker)
+        self.set(ticker, price, observed)
+        return price, observed
+
+    def invalidate(self, ticker=None):
+        with self._lock:
+            if ticker is None:
+                self._data.clear()
+            else:
+                self._data.pop(ticker, None)
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'size': len(self._data),
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': (self.hits / total) if total else 0.0,
+            }
+
+
+class PrevCloseCache:
+    """Previous session close per ticker, valid for one exchange date.
+
+    Entries are keyed on the ticker's own exchange date (see scheduler.exchange_date), so a
+    close fetched before the open or from another time zone is dropped when that exchange's
+    date rolls, not the machine's. Tickers missing or stale are fetched together in one batch.
+    A ticker the fetch left out (no data, a partial response, a failed shared fetch) is only
+    remembered for negative_ttl seconds, so one bad batch doesn't blank it for the day.
+    """
+
+    def __init__(self, negative_ttl=NEGATIVE_TTL, clock=time.monotonic):
+        self.negative_ttl = negative_ttl
+        self.clock = clock
+        # ticker -> (exchange date, close or None, monotonic time a None expires)
+        self._data = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get_many(self, tickers, fetch):
+        # fetch(tickers) -> {ticker: close}; only called for tickers without a close for today
+        today = exchange_dates(dict.fromkeys(tickers))
+        with self._lock:
+            now = self.clock()
+            missing = [t for t, date in today.items() if not self._valid(t, date, now)]
+            self.misses += len(missing)
+            self.hits += len(tickers) - len(missing)
+        if missing:
+            try:
+                fetched = fetch(missing)
+            except Exception:
+                fetched = None
+            if fetched is not None:
+                with self._lock:
+                    expires = self.clock() + self.negative_ttl
+                    for ticker in missing:
+                        close = fetched.get(ticker)
+                        self._data[ticker] = (today[ticker], close, None if close is not None else expires)
+        with self._lock:
+            now = self.clock()
+            return {t: self._data[t][1] if self._valid(t, today[t], now) else None for t in tickers}
+
+    def _valid(self, ticker, date, now):
+        # Caller holds _lock
+        entry = self._data.get(ticker)
+        return entry is not None and entry[0] == date and (entry[2] is None or now < entry[2])
+
+    def invalidate(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'size': len(self._data),
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': (self.hits / total) if total else 0.0,
+            }
+
+
+# Shared by PaperTradingAccount, the CLI loop and the GUI
+price_cache = PriceCache()
+prev_close_cache = PrevCloseCache()
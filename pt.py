@@ -1,10 +1,17 @@
 import tkinter as tk
 from tkinter import ttk
-from papertrading import PaperTradingAccount, parse_amount, resolve_ticker
-import yfinance as yf
-import matplotlib.pyplot as plt
-import pandas as pd
+from papertrading import PaperTradingAccount, parse_amount, resolve_ticker, fetch_prices, fetch_info, fetch_statement, HELP, parse_basket, load_basket, parse_order
+from orders import ORDER_KINDS, describe
+from pricecache import price_cache
+from barstore import get_bar_store
+from autosave import DEBOUNCE
+from metrics import span, format_stats
+from scheduler import PollScheduler
+from feed import StreamingFeed
+from valuation import value_positions, fmt_dollars, fmt_value, fmt_pct, position_types
+from lazy import lazy_import
 import threading
+import bisect
 import io
 import sys
 import time
@@ -20,6 +27,12 @@ ACCENT = '#4fa3ff'
 FONT_SANS = ('Segoe UI', 12)
 HEADER_FONT = ('Segoe UI', 13, 'bold')
 MONO_FONT = ('Consolas', 12)
+# Portfolio table columns, in the order of build_snapshot's row values and sort keys
+PORTFOLIO_COLUMNS = ('Ticker', 'Type', 'Quantity', 'Average Cost', 'Price', 'Value', 'P/L($)', 'P/L(%)', 'Daily P/L(%)')
+
+np = lazy_import('numpy')
+pd = lazy_import('pandas')
+plt = lazy_import('matplotlib.pyplot')
 
 class PaperTradingApp:
     def __init__(self, root, portfolio_id=None):
@@ -39,51 +52,108 @@ class PaperTradingApp:
                 self.root.iconbitmap(icon_path)
             except Exception:
                 pass
-        self.account = PaperTradingAccount(portfolio_id=portfolio_id)
-        self.account.load()
         self.latest_prices = {}  # Cache for latest prices
+        self.poll_scheduler = PollScheduler()
         self.price_thread_running = True
         self._last_sorted_col = None
         self._last_sort_desc = False
+        # Background valuation (see refresh_portfolio)
+        self._valuation_lock = threading.Lock()
+        self._valuation_running = False
+        self._valuation_pending = False
+        # Rows currently in the table: ticker -> Treeview item id, and ticker -> (values, tag) last rendered
+        self._row_items = {}
+        self._row_values = {}
+        self._row_keys = {}  # ticker -> numeric sort keys, see build_snapshot
         self.create_widgets()
         # Bind ~ and ` keys globally to focus input after widgets are created
         self.root.bind_all('<KeyRelease-asciitilde>', lambda event: self.input_entry.focus_set())
         self.root.bind_all('<KeyRelease-grave>', lambda event: self.input_entry.focus_set())
+        # Paint the window before loading the account, which pulls in numpy
+        self.root.update()
+        self.account = PaperTradingAccount(portfolio_id=portfolio_id, autosave=DEBOUNCE)
+        self.account.load()
         self.print_welcome()
         self.refresh_portfolio()
-        self.start_price_thread()
+        # PT_STREAM=host:port switches from polling to a push feed (see feed.py)
+        stream = os.environ.get('PT_STREAM')
+        if stream:
+            self.start_stream(stream)
+        else:
+            self.start_price_thread()
         self.schedule_ui_refresh()  # Add this line to start periodic UI refresh
 
     def start_price_thread(self):
         def price_updater():
             while self.price_thread_running:
-                tickers = self.account.Tickers
-                if tickers:
+                tickers = self.watched_tickers()
+                # Only tickers whose market is open (or whose retry/closed-market wait is up), stalest first
+                due = self.poll_scheduler.due(tickers)
+                if due:
                     try:
-                        # Use yfinance Tickers for batch price fetch
-                        data = yf.download(' '.join(tickers), period='1d', interval='1m', progress=False, group_by='ticker', threads=True, auto_adjust=False)
-                        for ticker in tickers:
-                            try:
-                                if len(tickers) == 1:
-                                    # Single ticker: data is not multi-indexed
-                                    price = data['Close'].iloc[-1]
-                                else:
-                                    price = data[ticker]['Close'].iloc[-1]
-                                # Only update if price is not None and not NaN
-                                if price is not None and not (isinstance(price, float) and (pd.isna(price) or (hasattr(pd, 'isnull') and pd.isnull(price)))):
-                                    self.latest_prices[ticker] = price
-                                # else: do not update, keep previous price
-                            except Exception:
-                                # Do not overwrite previous price if error
-                                pass
+                        # One batched download for every due ticker
+                        fetched = fetch_prices(due)
                     except Exception:
                         # Do not overwrite previous prices if error
-                        pass
-                time.sleep(5)
+                        fetched = None
+                    try:
+                        self.poll_scheduler.record(due, fetched)
+                        for ticker, price in (fetched or {}).items():
+                            # Only update if price is not None and not NaN, else keep previous price
+                            if price is not None and not pd.isna(price):
+                                self.latest_prices[ticker] = price
+                                # Share with account.price() so trades reuse this fetch
+                                price_cache.set(ticker, price)
+                        self.check_orders(fetched or {})
+                    except Exception as e:
+                        # One bad pass must not end polling
+                        self._post(self.print_output, f"Error updating prices: {e!r}", True)
+                time.sleep(self.poll_scheduler.sleep_time())
         threading.Thread(target=price_updater, daemon=True).start()
 
+    def start_stream(self, address):
+        # Ticks update latest_prices as they arrive; subscriptions follow the held tickers
+        # and those with resting orders
+        def on_tick(ticker, price, ts):
+            self.latest_prices[ticker] = price
+            price_cache.set(ticker, price)
+            self.check_orders({ticker: price})
+
+        self.feed = StreamingFeed(address, on_tick)
+        self.feed.subscribe(self.watched_tickers())
+        self.feed.start()
+
+        def follow_positions():
+            while self.price_thread_running:
+                self.feed.subscribe(self.watched_tickers())
+                time.sleep(1)
+        threading.Thread(target=follow_positions, daemon=True).start()
+
+    def watched_tickers(self):
+        # Held tickers (immutable snapshot, safe while trades happen on the Tk thread) plus
+        # tickers with resting orders
+        tickers = list(self.account.positions.tickers)
+        held = set(tickers)
+        tickers.extend(t for t in self.account.orders.tickers() if t not in held)
+        return tickers
+
+    def check_orders(self, prices):
+        # Runs on the price/feed thread; fills and errors are reported on the Tk thread
+        try:
+            results = self.account.check_orders(prices)
+        except Exception as e:
+            self._post(self.print_output, f"Error checking orders: {e!r}", True)
+            return
+        if results:
+            self._post(self.report_order_fills, results)
+
+    def report_order_fills(self, results):
+        for success, msg in results:
+            self.print_output(msg, error=not success)
+        self.refresh_portfolio()
+
     def get_price(self, ticker):
-        # Use cached price if available, else fallback to slow fetch
+        # Use cached price if available, else fallback to the shared TTL cache (fetches on miss)
         price = self.latest_prices.get(ticker)
         if price is not None:
             return price
@@ -113,7 +183,7 @@ class PaperTradingApp:
 
         tree_frame = tk.Frame(self.root, bg=DARK_BG)
         tree_frame.pack(padx=20, pady=(0, 18), fill='x')
-        self.tree = ttk.Treeview(tree_frame, columns=('Ticker', 'Type', 'Quantity', 'Average Cost', 'Price', 'Value', 'P/L($)', 'P/L(%)', 'Daily P/L(%)'), show='headings', height=15, selectmode='browse')
+        self.tree = ttk.Treeview(tree_frame, columns=PORTFOLIO_COLUMNS, show='headings', height=15, selectmode='browse')
         self._sort_orders = {col: False for col in self.tree['columns']}  # False: ascending, True: descending
         for col in self.tree['columns']:
             self.tree.heading(col, text=col, command=lambda _col=col: self.sort_by_column(_col))
@@ -153,7 +223,7 @@ class PaperTradingApp:
         if self.portfolio_id and self.portfolio_id != 1:
             if self.account.is_new_portfolio:
                 self.print_output(f"Created new portfolio {self.portfolio_id} with $100,000.00")
-                self.account.save()
+                self.account.save_async()
             else:
                 self.print_output(f"Loaded portfolio {self.portfolio_id}")
 
@@ -167,100 +237,114 @@ class PaperTradingApp:
         self.output.tag_config('error', foreground=RED)
 
     def refresh_portfolio(self):
-        for row in self.tree.get_children():
-            self.tree.delete(row)
-        tickers = self.account.Tickers
-        # Dynamically set Treeview height based on number of rows
-        num_rows = max(1, min(len(tickers), 20))
-        self.tree.config(height=num_rows)
-        qtys = self.account.Quantity
-        prices = []
-        values = []
-        pl_dollars = []
-        pl_percent = []
-        type_display = []
-        total_unrealized_pl = 0
-        total_invested = 0
-        daily_pl_percent = []
-        for ticker, qty, buy_price in zip(tickers, qtys, self.account.PurchasePrice):
-            p = self.get_price(ticker)
-            if p is None or (isinstance(p, float) and (pd.isna(p) or (hasattr(pd, 'isnull') and pd.isnull(p)))):
-                prices.append('N/A')
-                values.append('N/A')
-                pl_dollars.append('N/A')
-                pl_percent.append('N/A')
-                type_display.append('')
-            else:
-                prices.append(f"${p:,.2f}")
-                value = p * abs(qty)
-                if qty > 0:
-                    values.append(f"${value:,.2f}")
-                    pl = value - (buy_price * qty)
-                    pl_pct = (pl / (buy_price * qty)) * 100
-                    total_unrealized_pl += pl
-                    total_invested += buy_price * qty
-                    type_display.append('LONG')
-                elif qty < 0:
-                    values.append(f"-${value:,.2f}")
-                    pl = (buy_price - p) * abs(qty)
-                    pl_pct = (pl / (buy_price * abs(qty))) * 100 if buy_price != 0 else 0
-                    total_unrealized_pl += pl
-                    total_invested += buy_price * abs(qty)
-                    type_display.append('SHORT')
-                else:
-                    values.append(f"${value:,.2f}")
-                    pl = 0
-                    pl_pct = 0
-                    type_display.append('')
-                pl_dollars.append(f"${pl:,.2f}")
-                pl_percent.append(f"{pl_pct:.2f}%")
-            # Calculate daily P/L (%)
+        # Valuation runs on a worker thread; only render_portfolio touches Tk.
+        # If a valuation is already running, ask it to go round once more instead of stacking threads.
+        with self._valuation_lock:
+            if self._valuation_running:
+                self._valuation_pending = True
+                return
+            self._valuation_running = True
+        threading.Thread(target=self._valuation_worker, daemon=True).start()
+
+    def _valuation_worker(self):
+        while True:
             try:
-                tkf = yf.Ticker(ticker)
-                hist = tkf.history(period="2d")
-                if len(hist) < 2 or p is None:
-                    daily_pct = None
-                else:
-                    prev_close = hist['Close'].iloc[-2]
-                    if prev_close == 0:
-                        daily_pct = None
-                    elif qty > 0:
-                        daily_pct = ((p - prev_close) / prev_close) * 100
-                    elif qty < 0:
-                        daily_pct = ((prev_close - p) / prev_close) * 100
-                    else:
-                        daily_pct = 0
-            except Exception:
-                daily_pct = None
-            if daily_pct is None:
-                daily_pl_percent.append('N/A')
+                snapshot = self.build_snapshot()
+            except Exception as e:
+                # Keep showing the previous snapshot, but say why it is stale
+                self._post(self.print_output, f"Error refreshing portfolio: {e!r}", True)
             else:
-                daily_pl_percent.append(f"{daily_pct:+.2f}%")
-        realized_pl = self.account.get_realized_pl()
-        overall_pl = total_unrealized_pl + realized_pl
-        for i in range(len(tickers)):
-            avg_cost = self.account.PurchasePrice[i]
-            avg_cost_str = f"${avg_cost:,.2f}" if avg_cost is not None else 'N/A'
-            # Remove zebra striping, only use P/L coloring
-            row_tags = []
-            # Color P/L column
-            pl_val = pl_dollars[i]
-            if isinstance(pl_val, str) and pl_val.startswith('$'):
-                try:
-                    pl_num = float(pl_val.replace('$','').replace(',',''))
-                    if pl_num > 0:
-                        row_tags.append('pl_positive')
-                    elif pl_num < 0:
-                        row_tags.append('pl_negative')
-                    else:
-                        row_tags.append('pl_neutral')
-                except Exception:
-                    row_tags.append('pl_neutral')
+                self._post(self.render_portfolio, snapshot)
+            with self._valuation_lock:
+                if not self._valuation_pending:
+                    self._valuation_running = False
+                    return
+                self._valuation_pending = False
+
+    def _post(self, fn, *args):
+        # Run fn on the Tk thread; after() raises once the window has been closed, and then
+        # there is nothing left to update
+        try:
+            self.root.after(0, fn, *args)
+        except (RuntimeError, tk.TclError):
+            pass
+
+    @span('gui.snapshot')
+    def build_snapshot(self):
+        # Runs off the Tk thread: does all fetching and math, returns display-ready rows and totals
+        # One immutable snapshot, so tickers, quantities, costs and the balances stay aligned even if a
+        # trade lands meanwhile
+        positions = self.account.positions
+        tickers = list(positions.tickers)
+        qtys = positions.quantities.tolist()
+        buy_prices = positions.costs.tolist()
+        # Anything the price thread hasn't seen yet is fetched in one batch instead of per row
+        missing = [t for t in tickers if self.latest_prices.get(t) is None]
+        if missing:
+            for ticker, p in zip(missing, self.account.prices(missing)):
+                if not pd.isna(p):
+                    self.latest_prices[ticker] = p
+        prices = np.array([np.nan if self.latest_prices.get(t) is None else self.latest_prices[t] for t in tickers], dtype=float)
+        # Previous closes only change once a day, so this is a dict lookup after the first batch
+        prev_closes = self.account.previous_closes(tickers)
+        prev = np.array([np.nan if prev_closes.get(t) is None else prev_closes[t] for t in tickers], dtype=float)
+        v = value_positions(qtys, buy_prices, prices, prev)
+        total_unrealized_pl = v.total_unrealized_pl
+        types = position_types(v)
+        rows = []
+        for i, ticker in enumerate(tickers):
+            values = (ticker, types[i], f"{qtys[i]:.4f}", fmt_dollars(buy_prices[i]), fmt_dollars(v.price[i]),
+                      fmt_value(v.value[i]), fmt_dollars(v.pl[i]), fmt_pct(v.pl_pct[i]), fmt_pct(v.daily_pct[i], signed=True))
+            # Only P/L coloring, no zebra striping
+            pl = v.pl[i]
+            tag = 'pl_positive' if pl > 0 else 'pl_negative' if pl < 0 else 'pl_neutral'
+            # Numeric shadow of the row, same column order, None where the cell shows N/A
+            keys = (ticker, types[i], qtys[i], buy_prices[i]) + tuple(
+                None if np.isnan(x) else float(x) for x in (v.price[i], v.value[i], v.pl[i], v.pl_pct[i], v.daily_pct[i]))
+            rows.append((values, tag, keys))
+        return {
+            'rows': rows,
+            'cash': positions.cash,
+            'total_unrealized_pl': total_unrealized_pl,
+            'realized_pl': positions.realized_pl,
+        }
+
+    @span('gui.render')
+    def render_portfolio(self, snapshot):
+        # Diff against what's on screen: only changed cells are updated, rows are only
+        # inserted/deleted when positions open/close, and the sort only re-runs if needed
+        rows = snapshot['rows']
+        sort_col = self._last_sorted_col if self._last_sorted_col is not None else 'Value'
+        sort_idx = self.tree['columns'].index(sort_col)
+        resort = False
+        seen = set()
+        for values, tag, keys in rows:
+            ticker = values[0]
+            seen.add(ticker)
+            item = self._row_items.get(ticker)
+            if item is None:
+                self._row_items[ticker] = self.tree.insert('', 'end', values=values, tags=(tag,))
+                resort = True
             else:
-                row_tags.append('pl_neutral')
-            self.tree.insert('', 'end', values=(tickers[i], type_display[i], f"{qtys[i]:.4f}", avg_cost_str, prices[i], values[i], pl_dollars[i], pl_percent[i], daily_pl_percent[i]), tags=tuple(row_tags))
-        self.cash_var.set(f"Cash: ${self.account.get_cash():,.2f}")
+                old_values, old_tag = self._row_values[ticker]
+                if old_values != values or old_tag != tag:
+                    self.tree.item(item, values=values, tags=(tag,))
+                if self._row_keys[ticker][sort_idx] != keys[sort_idx]:
+                    resort = True
+            self._row_values[ticker] = (values, tag)
+            self._row_keys[ticker] = keys
+        for ticker in [t for t in self._row_items if t not in seen]:
+            self.tree.delete(self._row_items.pop(ticker))
+            del self._row_values[ticker]
+            del self._row_keys[ticker]
+        # Dynamically set Treeview height based on number of rows
+        num_rows = max(1, min(len(rows), 20))
+        if int(self.tree.cget('height')) != num_rows:
+            self.tree.config(height=num_rows)
+        self.cash_var.set(f"Cash: ${snapshot['cash']:,.2f}")
         # Overall P/L display
+        total_unrealized_pl = snapshot['total_unrealized_pl']
+        realized_pl = snapshot['realized_pl']
         STARTING_VALUE = 100000  # Fixed starting value for P/L percentage
         if STARTING_VALUE > 0:
             pl_pct = (total_unrealized_pl / STARTING_VALUE) * 100
@@ -270,6 +354,8 @@ class PaperTradingApp:
         self.pl_label.config(fg=pl_color)
         self.pl_var.set(f"Unrealized P/L: ${total_unrealized_pl:,.2f}  ({pl_pct:+.2f}%)\nRealized P/L: ${realized_pl:,.2f}")
         # Re-apply last sort if any, else default to Value descending
+        if not resort:
+            return
         if self._last_sorted_col is not None:
             self.sort_by_column(self._last_sorted_col, force_desc=self._last_sort_desc, remember=False)
         else:
@@ -335,8 +421,26 @@ class PaperTradingApp:
                     amount = parse_amount(a2)
                 success, msg = self.account.cover(ticker, amount)
                 self.print_output(msg, error=not success)
+            elif cmd == 'basket' and args:
+                # 'basket buy AAPL 50k, sell TSLA 10k' or 'basket orders.csv'; all fill or none do
+                rest = cmdline.split(None, 1)[1]
+                orders = load_basket(rest) if rest.lower().endswith('.csv') else parse_basket(rest)
+                success, msgs = self.account.execute_batch(orders)
+                self.print_output('\n'.join(msgs), error=not success)
+            elif cmd in ORDER_KINDS:
+                # 'limit buy AAPL 50k 150', 'stop sellall TSLA 180', 'stoplimit sell MSFT 10k 300 295'
+                op, ticker, amount, kind, limit, stop = parse_order(parts)
+                success, msg = self.account.place_order(op, ticker, amount, kind, limit, stop)
+                self.print_output(msg, error=not success)
+            elif cmd == 'orders':
+                orders = self.account.open_orders()
+                self.print_output('\n'.join(describe(o) for o in orders) if orders else 'No open orders')
+            elif cmd == 'cancel' and len(args) == 1:
+                success, msg = self.account.cancel_order(int(args[0].lstrip('#')))
+                self.print_output(msg, error=not success)
             elif cmd == 'save':
-                self.account.save()
+                # Written by the autosave thread so the UI never waits on disk
+                self.account.save_async()
                 self.print_output('Portfolio saved.')
             elif cmd == 'load':
                 self.account.load()
@@ -345,7 +449,9 @@ class PaperTradingApp:
                 self.refresh_portfolio()
                 self.print_output('Portfolio refreshed.')
             elif cmd == 'help':
-                self.print_output("""Commands:\n  buy (ticker) (amount)\n  sell (ticker) (amount)\n  sellall (ticker)\n  short (ticker) (amount)\n  cover (ticker) (amount)\n  q (ticker)\n  g (ticker)\n  des (ticker)\n  fa (ticker)\n  save\n  load\n  list\n  help\n  exit\nExamples:\n  buy AAPL 50k\n  sell TSLA 10k\n  short MSFT 100k\n  cover MSFT 50k\n  q AAPL\n  g TSLA\n  des MSFT\n  fa AAPL\n""")
+                self.print_output(HELP)
+            elif cmd == 'stats':
+                self.print_output(format_stats())
             elif cmd == 'q' and len(args) == 1:
                 self.quote(resolve_ticker(args[0]))
             elif cmd == 'g' and len(args) == 1:
@@ -355,7 +461,7 @@ class PaperTradingApp:
             elif cmd == 'fa' and len(args) == 1:
                 threading.Thread(target=self.show_financials, args=(resolve_ticker(args[0]),)).start()
             elif cmd in ('exit', 'quit'):
-                self.account.save()
+                self.account.close()
                 self.root.destroy()
                 sys.exit()
             else:
@@ -371,20 +477,17 @@ class PaperTradingApp:
             return
         self.print_output(f"Price: ${p:,.2f}")
         try:
-            tkf = yf.Ticker(ticker)
-            hist = tkf.history(period="2d")
-            if len(hist) < 2:
+            prev_close = self.account.previous_closes([ticker])[ticker]
+            if prev_close is None:
                 self.print_output("(No previous close data)")
             else:
-                prev_close = hist['Close'].iloc[-2]
                 change = p - prev_close
                 percent_change = (change / prev_close) * 100
                 self.print_output(f"Daily Change: ${change:+.2f} ({percent_change:+.2f}%)")
         except Exception as e:
             self.print_output(f"(Error getting daily change: {e})", error=True)
         try:
-            tkf = yf.Ticker(ticker)
-            ytd_hist = tkf.history(period="ytd")
+            ytd_hist = get_bar_store().history(ticker, period="ytd")
             if not ytd_hist.empty:
                 ytd_start_price = ytd_hist['Close'].iloc[0]
                 ytd_change = p - ytd_start_price
@@ -395,8 +498,7 @@ class PaperTradingApp:
         except Exception as e:
             self.print_output(f"(Error getting YTD change: {e})", error=True)
         try:
-            tkf = yf.Ticker(ticker)
-            hist = tkf.history(period="2d")
+            hist = get_bar_store().history(ticker, period="2d")
             if hist.empty:
                 self.print_output(f"No data found for {ticker}")
             else:
@@ -407,8 +509,7 @@ class PaperTradingApp:
 
     def plot_yearly(self, ticker):
         try:
-            tkf = yf.Ticker(ticker)
-            hist = tkf.history(period="1y")
+            hist = get_bar_store().history(ticker, period="1y")
             if hist.empty:
                 self.print_output(f"No data found for {ticker}", error=True)
                 return
@@ -427,8 +528,7 @@ class PaperTradingApp:
 
     def description(self, ticker):
         try:
-            tkf = yf.Ticker(ticker)
-            info = tkf.info
+            info = fetch_info(ticker)
             desc = info.get("longBusinessSummary") or info.get("shortBusinessSummary")
             if desc:
                 self.print_output(desc)
@@ -440,7 +540,6 @@ class PaperTradingApp:
     def show_financials(self, ticker):
         import re
         try:
-            tkf = yf.Ticker(ticker)
             income_keys = [
                 'Total Revenue', 'Operating Revenue', 'Gross Profit', 'Operating Income', 'Net Income',
                 'Diluted EPS', 'Basic EPS', 'EBITDA', 'EBIT'
@@ -482,9 +581,9 @@ class PaperTradingApp:
                 df = df.map(fmt)
                 df.index.name = None
                 return df
-            financials = tkf.quarterly_financials
-            cashflow = tkf.quarterly_cashflow
-            balance = tkf.quarterly_balance_sheet
+            financials = fetch_statement(ticker, 'financials')
+            cashflow = fetch_statement(ticker, 'cashflow')
+            balance = fetch_statement(ticker, 'balance_sheet')
             # Income Statement
             if not financials.empty:
                 available_keys = [k for k in income_keys if k in financials.index]
@@ -522,32 +621,100 @@ class PaperTradingApp:
         self.refresh_portfolio()
         self.root.after(5000, self.schedule_ui_refresh)
 
+    @span('gui.sort')
     def sort_by_column(self, col, force_desc=None, remember=True):
-        # Get all items from the treeview
-        data = [(self.tree.set(k, col), k) for k in self.tree.get_children('')]
-        # Try to convert data to float for numeric columns
-        def try_float(val):
-            try:
-                # Remove $ and % and commas for conversion
-                return float(val.replace('$','').replace('%','').replace(',','').replace('(','-').replace(')',''))
-            except Exception:
-                return val
-        # Determine sort order
+        # Sort on the numeric shadow model rather than parsing the display strings back
         if force_desc is not None:
             reverse = force_desc
         else:
             reverse = self._sort_orders[col]
-        data.sort(key=lambda t: try_float(t[0]), reverse=reverse)
+        col_idx = self.tree['columns'].index(col)
+        tickers = sort_tickers(self._row_keys, col_idx, reverse)
+        target = [self._row_items[t] for t in tickers]
         # Toggle sort order for next click
         self._sort_orders[col] = not reverse
-        # Rearrange items in sorted positions
-        for index, (val, k) in enumerate(data):
-            self.tree.move(k, '', index)
+        for item, index in plan_moves(list(self.tree.get_children('')), target):
+            self.tree.move(item, '', index)
         # Remember last sort
         if remember:
             self._last_sorted_col = col
             self._last_sort_desc = reverse
 
+
+def sort_tickers(row_keys, col_idx, reverse):
+    # Order tickers by one column of their sort keys; N/A (None) rows always go last
+    present = [t for t, keys in row_keys.items() if keys[col_idx] is not None]
+    missing = [t for t, keys in row_keys.items() if keys[col_idx] is None]
+    present.sort(key=lambda t: row_keys[t][col_idx], reverse=reverse)
+    return present + missing
+
+
+def plan_moves(current, target):
+    # Fewest Treeview moves turning order `current` into `target`: items on a longest increasing
+    # run (by current position) stay put, every other item is moved to just after its target predecessor.
+    # Returns [(item, index)] where index is the final position, as Treeview.move expects.
+    # O(n log n), so a full re-sort of thousands of rows stays off the critical path of the Tk thread.
+    if current == target:
+        return []
+    pos = {item: i for i, item in enumerate(current)}
+    seq = [pos[item] for item in target]
+    # Patience sorting for the longest increasing subsequence
+    tails, tails_idx, prev = [], [], [-1] * len(seq)
+    for i, v in enumerate(seq):
+        k = bisect.bisect_left(tails, v)
+        if k == len(tails):
+            tails.append(v)
+            tails_idx.append(i)
+        else:
+            tails[k] = v
+            tails_idx[k] = i
+        prev[i] = tails_idx[k - 1] if k > 0 else -1
+    keep = set()
+    i = tails_idx[-1] if tails_idx else -1
+    while i != -1:
+        keep.add(target[i])
+        i = prev[i]
+    if len(keep) * 2 < len(target):
+        # Most rows move anyway: placing every item in turn needs no index bookkeeping
+        return [(item, i) for i, item in enumerate(target)]
+    # A moved item ends up in a chain right after the last kept item before it in target (or at
+    # the front), so its slot is (that item's current position, place in the chain). A Fenwick
+    # tree over all slots counts the occupied ones before a slot, i.e. the live Treeview index.
+    slots, anchor, chain = {}, -1, 0
+    for item in target:
+        if item in keep:
+            anchor, chain = pos[item], 0
+        else:
+            chain += 1
+            slots[item] = (anchor, chain)
+    rank = {slot: r for r, slot in enumerate(sorted([(i, 0) for i in range(len(current))] + list(slots.values())))}
+    tree = [0] * (len(rank) + 1)
+
+    def add(r, delta):
+        r += 1
+        while r < len(tree):
+            tree[r] += delta
+            r += r & -r
+
+    def before(r):
+        count = 0
+        while r > 0:
+            count += tree[r]
+            r -= r & -r
+        return count
+
+    for i in range(len(current)):
+        add(rank[(i, 0)], 1)
+    moves = []
+    for item in target:
+        if item in keep:
+            continue
+        add(rank[(pos[item], 0)], -1)
+        r = rank[slots[item]]
+        moves.append((item, before(r)))
+        add(r, 1)
+    return moves
+
 if __name__ == '__main__':
     import re
     portfolio_id = None
@@ -3,6 +3,7 @@ import pandas as pd
 import matplotlib.pyplot as plt
 import yfinance as yf
 import datetime
+from collections import namedtuple
 from tabulate import tabulate
 import os
 
@@ -55,6 +56,18 @@ def price(ticker):
         print(f"Error getting price for {ticker}: {e}")
         return None
 
+# One price observation, taken once per trade and reused for validation, fill, P/L and message
+Quote = namedtuple('Quote', ['ticker', 'price', 'timestamp'])
+
+last_quote = None  # Quote of the last fill by the module-level functions
+
+def snapshot(ticker):
+    return Quote(ticker, price(ticker), datetime.datetime.now())
+
+def quote_note(q):
+    # Appended to fill messages so the time of the fill price is visible
+    return f" (quote {q.timestamp:%H:%M:%S})"
+
 def format_amount(amount):
     # Format with commas, no decimal if .0
     if amount == int(amount):
@@ -63,8 +76,9 @@ def format_amount(amount):
         return f"${amount:,.2f}"
 
 def buy(ticker, amount):
-    global Cash, Tickers, Quantity, PurchasePrice
-    p = price(ticker)
+    global Cash, Tickers, Quantity, PurchasePrice, last_quote
+    q = snapshot(ticker)
+    p = q.price
     if p is None:
         return
     if Cash >= amount:
@@ -81,43 +95,56 @@ def buy(ticker, amount):
             Quantity.append(amount / p)
             PurchasePrice.append(p)
         Cash -= amount
-        list(f"Bought {format_amount(amount)} of {ticker} @ ${p}")
+        last_quote = q
+        list(f"Bought {format_amount(amount)} of {ticker} @ ${p}" + quote_note(q))
     else:
         print("Not enough cash")
 
 def sell(ticker, amount):
-    global Cash, Tickers, Quantity, PurchasePrice
+    global Cash, Tickers, Quantity, PurchasePrice, last_quote
     idx = Tickers.index(ticker) if ticker in Tickers else -1
-    if price(ticker) is None or idx == -1:
+    if idx == -1:
+        return
+    q = snapshot(ticker)
+    p = q.price
+    if p is None:
         return
-    if amount > price(ticker)*Quantity[idx]:
+    if amount > p*Quantity[idx]:
         print("Not enough shares")
-    elif amount == price(ticker)*Quantity[idx]:
+    elif amount == p*Quantity[idx]:
         Cash += amount
         Quantity.pop(idx)
         Tickers.pop(idx)
         PurchasePrice.pop(idx)
-        list(f"Sold {format_amount(amount)} of {ticker} @ ${price(ticker)}")
+        last_quote = q
+        list(f"Sold {format_amount(amount)} of {ticker} @ ${p}" + quote_note(q))
     else:
         Cash += amount
-        Quantity[idx] -= amount/price(ticker)
-        list(f"Sold {format_amount(amount)} of {ticker} @ ${price(ticker)}")
+        Quantity[idx] -= amount/p
+        last_quote = q
+        list(f"Sold {format_amount(amount)} of {ticker} @ ${p}" + quote_note(q))
 
 def sellall(ticker):
-    global Cash, Tickers, Quantity, PurchasePrice
+    global Cash, Tickers, Quantity, PurchasePrice, last_quote
     idx = Tickers.index(ticker) if ticker in Tickers else -1
-    if price(ticker) is None or idx == -1:
+    if idx == -1:
+        return
+    q = snapshot(ticker)
+    p = q.price
+    if p is None:
         return
-    amt = price(ticker)*Quantity[idx]
+    amt = p*Quantity[idx]
     Cash += amt
     Quantity.pop(idx)
     Tickers.pop(idx)
     PurchasePrice.pop(idx)
-    list(f"Sold all of {ticker} @ ${price(ticker)} for {format_amount(amt)}")
+    last_quote = q
+    list(f"Sold all of {ticker} @ ${p} for {format_amount(amt)}" + quote_note(q))
 
 def short(ticker, amount):
-    global Cash, Tickers, Quantity, PurchasePrice
-    p = price(ticker)
+    global Cash, Tickers, Quantity, PurchasePrice, last_quote
+    q = snapshot(ticker)
+    p = q.price
     if p is None:
         return
     # Short selling: open or increase a short position
@@ -139,11 +166,13 @@ def short(ticker, amount):
         Quantity.append(-amount / p)
         PurchasePrice.append(p)
     Cash += amount
-    list(f"Shorted {format_amount(amount)} of {ticker} @ ${p}")
+    last_quote = q
+    list(f"Shorted {format_amount(amount)} of {ticker} @ ${p}" + quote_note(q))
 
 def cover(ticker, amount):
-    global Cash, Tickers, Quantity, PurchasePrice
-    p = price(ticker)
+    global Cash, Tickers, Quantity, PurchasePrice, last_quote
+    q = snapshot(ticker)
+    p = q.price
     if p is None:
         return
     if ticker in Tickers:
@@ -159,11 +188,13 @@ def cover(ticker, amount):
                 Quantity.pop(idx)
                 Tickers.pop(idx)
                 PurchasePrice.pop(idx)
-                list(f"Covered {format_amount(amount)} of {ticker} @ ${p}")
+                last_quote = q
+                list(f"Covered {format_amount(amount)} of {ticker} @ ${p}" + quote_note(q))
             else:
                 Cash -= amount
                 Quantity[idx] += shares_to_cover
-                list(f"Covered {format_amount(amount)} of {ticker} @ ${p}")
+                last_quote = q
+                list(f"Covered {format_amount(amount)} of {ticker} @ ${p}" + quote_note(q))
         else:
             print("You do not have a short position in this ticker.")
     else:
@@ -427,6 +458,7 @@ class PaperTradingAccount:
         self.Quantity = []
         self.PurchasePrice = []
         self.realized_pl = 0.0
+        self.last_quote = None
 
     def save(self):
         df = pd.DataFrame({
@@ -469,8 +501,13 @@ class PaperTradingAccount:
         except Exception as e:
             return None
 
+    def snapshot(self, ticker):
+        # Single quote for a whole trade; the successful fill's quote is kept in last_quote
+        return Quote(ticker, self.price(ticker), datetime.datetime.now())
+
     def buy(self, ticker, amount):
-        p = self.price(ticker)
+        q = self.snapshot(ticker)
+        p = q.price
         if p is None:
             return False, f"No price data for {ticker}"
         if self.Cash >= amount:
@@ -486,13 +523,15 @@ class PaperTradingAccount:
                 self.Quantity.append(amount / p)
                 self.PurchasePrice.append(p)
             self.Cash -= amount
-            return True, f"Bought {format_amount(amount)} of {ticker} @ ${p}"
+            self.last_quote = q
+            return True, f"Bought {format_amount(amount)} of {ticker} @ ${p}" + quote_note(q)
         else:
             return False, "Not enough cash"
 
     def sell(self, ticker, amount):
         idx = self.Tickers.index(ticker) if ticker in self.Tickers else -1
-        p = self.price(ticker)
+        q = self.snapshot(ticker)
+        p = q.price
         if p is None or idx == -1:
             return False, f"No position or price for {ticker}"
         if amount > p * self.Quantity[idx]:
@@ -507,7 +546,8 @@ class PaperTradingAccount:
             self.Quantity.pop(idx)
             self.Tickers.pop(idx)
             self.PurchasePrice.pop(idx)
-            return True, f"Sold {format_amount(amount)} of {ticker} @ ${p}"
+            self.last_quote = q
+            return True, f"Sold {format_amount(amount)} of {ticker} @ ${p}" + quote_note(q)
         else:
             # Partial sell: realize P/L on sold shares
             buy_price = self.PurchasePrice[idx]
@@ -516,11 +556,13 @@ class PaperTradingAccount:
             self.realized_pl += pl
             self.Cash += amount
             self.Quantity[idx] -= shares_sold
-            return True, f"Sold {format_amount(amount)} of {ticker} @ ${p}"
+            self.last_quote = q
+            return True, f"Sold {format_amount(amount)} of {ticker} @ ${p}" + quote_note(q)
 
     def sellall(self, ticker):
         idx = self.Tickers.index(ticker) if ticker in self.Tickers else -1
-        p = self.price(ticker)
+        q = self.snapshot(ticker)
+        p = q.price
         if p is None or idx == -1:
             return False, f"No position or price for {ticker}"
         qty = self.Quantity[idx]
@@ -532,11 +574,13 @@ class PaperTradingAccount:
         self.Quantity.pop(idx)
         self.Tickers.pop(idx)
         self.PurchasePrice.pop(idx)
-        return True, f"Sold all of {ticker} @ ${p} for {format_amount(amt)}"
+        self.last_quote = q
+        return True, f"Sold all of {ticker} @ ${p} for {format_amount(amt)}" + quote_note(q)
 
     def coverall(self, ticker):
         idx = self.Tickers.index(ticker) if ticker in self.Tickers else -1
-        p = self.price(ticker)
+        q = self.snapshot(ticker)
+        p = q.price
         if p is None or idx == -1:
             return False, f"No position or price for {ticker}"
         if self.Quantity[idx] >= 0:
@@ -550,10 +594,12 @@ class PaperTradingAccount:
         self.Quantity.pop(idx)
         self.Tickers.pop(idx)
         self.PurchasePrice.pop(idx)
-        return True, f"Covered all of {ticker} @ ${p} for {format_amount(amt)}"
+        self.last_quote = q
+        return True, f"Covered all of {ticker} @ ${p} for {format_amount(amt)}" + quote_note(q)
 
     def short(self, ticker, amount):
-        p = self.price(ticker)
+        q = self.snapshot(ticker)
+        p = q.price
         if p is None:
             return False, f"No price data for {ticker}"
         if ticker in self.Tickers:
@@ -570,10 +616,12 @@ class PaperTradingAccount:
             self.Quantity.append(-amount / p)
             self.PurchasePrice.append(p)
         self.Cash += amount
-        return True, f"Shorted {format_amount(amount)} of {ticker} @ ${p}"
+        self.last_quote = q
+        return True, f"Shorted {format_amount(amount)} of {ticker} @ ${p}" + quote_note(q)
 
     def cover(self, ticker, amount):
-        p = self.price(ticker)
+        q = self.snapshot(ticker)
+        p = q.price
         if p is None:
             return False, f"No price data for {ticker}"
         if ticker in self.Tickers:
@@ -592,7 +640,8 @@ class PaperTradingAccount:
                     self.Quantity.pop(idx)
                     self.Tickers.pop(idx)
                     self.PurchasePrice.pop(idx)
-                    return True, f"Covered {format_amount(amount)} of {ticker} @ ${p}"
+                    self.last_quote = q
+                    return True, f"Covered {format_amount(amount)} of {ticker} @ ${p}" + quote_note(q)
                 else:
                     # Partial cover: realize P/L on covered shares
                     buy_price = self.PurchasePrice[idx]
@@ -600,7 +649,8 @@ class PaperTradingAccount:
                     self.realized_pl += pl
                     self.Cash -= amount
                     self.Quantity[idx] += shares_to_cover
-                    return True, f"Covered {format_amount(amount)} of {ticker} @ ${p}"
+                    self.last_quote = q
+                    return True, f"Covered {format_amount(amount)} of {ticker} @ ${p}" + quote_note(q)
             else:
                 return False, "You do not have a short position in this ticker."
         else:
@@ -0,0 +1,185 @@
+import datetime
+import os
+import threading
+import time
+from collections import namedtuple
+
+POLL_INTERVAL = float(os.environ.get('PT_POLL_INTERVAL', 5.0))  # Seconds between polls of an open market
+CLOSED_INTERVAL = 1800.0  # Seconds between polls of a closed market (keeps the last close fresh)
+MAX_BACKOFF = 300.0       # Cap on the retry delay after repeated failures
+MAX_DOUBLINGS = 16        # Backoff stops doubling after this many failures (max_backoff caps it earlier)
+MAX_BATCH = 50            # Tickers per download; the stalest go first
+
+# Regular session for cash markets: timezone, open and close (local time), trading weekdays Mon=0..Fri=4
+Session = namedtuple('Session', ['tz', 'open', 'close'])
+
+CRYPTO_SUFFIXES = ('-USD', '-USDT', '-EUR', '-BTC')
+
+US_EQUITY = Session('America/New_York', datetime.time(9, 30), datetime.time(16, 0))
+
+# Yahoo ticker suffix -> exchange session
+EXCHANGE_SESSIONS = {
+    '.TO': Session('America/Toronto', datetime.time(9, 30), datetime.time(16, 0)),
+    '.L': Session('Europe/London', datetime.time(8, 0), datetime.time(16, 30)),
+    '.DE': Session('Europe/Berlin', datetime.time(9, 0), datetime.time(17, 30)),
+    '.F': Session('Europe/Berlin', datetime.time(8, 0), datetime.time(20, 0)),
+    '.PA': Session('Europe/Paris', datetime.time(9, 0), datetime.time(17, 30)),
+    '.AS': Session('Europe/Amsterdam', datetime.time(9, 0), datetime.time(17, 30)),
+    '.SW': Session('Europe/Zurich', datetime.time(9, 0), datetime.time(17, 30)),
+    '.HK': Session('Asia/Hong_Kong', datetime.time(9, 30), datetime.time(16, 0)),
+    '.T': Session('Asia/Tokyo', datetime.time(9, 0), datetime.time(15, 30)),
+    '.AX': Session('Australia/Sydney', datetime.time(10, 0), datetime.time(16, 0)),
+}
+
+
+def _zone(name):
+    try:
+        from zoneinfo import ZoneInfo
+        return ZoneInfo(name)
+    except Exception:
+        return None
+
+
+def exchange_tz(ticker):
+    # IANA timezone a ticker's trading dates are counted in; futures and FX roll in New York
+    if ticker.endswith(CRYPTO_SUFFIXES):
+        return 'UTC'
+    if ticker.endswith(('=F', '=X')):
+        return 'America/New_York'
+    if '.' in ticker:
+        return EXCHANGE_SESSIONS.get(ticker[ticker.rindex('.'):], US_EQUITY).tz
+    return US_EQUITY.tz
+
+
+def exchange_date(ticker, now=None):
+    # Today's date at ticker's exchange (the machine's local date without timezone data)
+    tz = _zone(exchange_tz(ticker))
+    if tz is None:
+        return datetime.date.today()
+    return (now or datetime.datetime.now(datetime.timezone.utc)).astimezone(tz).date()
+
+
+def exchange_dates(tickers, now=None):
+    # {ticker: exchange_date} with one timezone conversion per exchange rather than per ticker
+    now = now or datetime.datetime.now(datetime.timezone.utc)
+    by_tz = {}
+    dates = {}
+    for ticker in tickers:
+        tz = exchange_tz(ticker)
+        if tz not in by_tz:
+            by_tz[tz] = exchange_date(ticker, now)
+        dates[ticker] = by_tz[tz]
+    return dates
+
+
+def market_open(ticker, now=None):
+    """Whether ticker's market is trading at now (aware datetime, default the current time).
+
+    Futures (=F) follow the CME Globex week: Sunday 18:00 to Friday 17:00 New York time with a
+    daily 17:00-18:00 break. FX (=X) trades Sunday 17:00 to Friday 17:00 New York time, crypto
+    (-USD etc.) around the clock. Everything else uses its exchange's regular weekday session,
+    US hours by default. Holidays are not modelled. Without timezone data every market counts
+    as open, which is the old poll-everything behaviour.
+    """
+    now = now or datetime.datetime.now(datetime.timezone.utc)
+    if ticker.endswith(CRYPTO_SUFFIXES):
+        return True
+    if ticker.endswith(('=F', '=X')):
+        tz = _zone('America/New_York')
+        if tz is None:
+            return True
+        local = now.astimezone(tz)
+        day, t = local.weekday(), local.time()
+        if ticker.endswith('=X'):
+            return (day < 4) or (day == 4 and t < datetime.time(17)) or (day == 6 and t >= datetime.time(17))
+        if day == 5 or (day == 4 and t >= datetime.time(17)) or (day == 6 and t < datetime.time(18)):
+            return False
+        return not (datetime.time(17) <= t < datetime.time(18))
+    session = US_EQUITY
+    if '.' in ticker:
+        session = EXCHANGE_SESSIONS.get(ticker[ticker.rindex('.'):], US_EQUITY)
+    tz = _zone(session.tz)
+    if tz is None:
+        return True
+    local = now.astimezone(tz)
+    return local.weekday() < 5 and session.open <= local.time() < session.close
+
+
+class PollScheduler:
+    """Decides which held tickers the price thread fetches on each pass.
+
+    Tickers whose market is open are polled every `interval` seconds, closed ones every
+    `closed_interval`, and a ticker never fetched is due at once. A ticker the source fails
+    to price backs off exponentially (interval * 2**failures, capped at max_backoff). Due
+    tickers are returned stalest first, at most max_batch per pass.
+    """
+
+    def __init__(self, interval=POLL_INTERVAL, closed_interval=CLOSED_INTERVAL, max_backoff=MAX_BACKOFF,
+                 max_batch=MAX_BATCH, is_open=market_open, clock=time.monotonic):
+        self.interval = interval
+        self.closed_interval = closed_interval
+        self.max_backoff = max_backoff
+        self.max_batch = max_batch
+        self.is_open = is_open
+        self.clock = clock
+        self._state = {}  # ticker -> [next_due, last_success, failures]
+        self._lock = threading.Lock()
+        self.polled = 0   # tickers fetched
+        self.skipped = 0  # tickers held but not due on a pass
+
+    def due(self, tickers):
+        now = self.clock()
+        wall = datetime.datetime.now(datetime.timezone.utc)
+        held = set(tickers)
+        with self._lock:
+            for ticker in [t for t in self._state if t not in held]:
+                # Position closed: forget it so a reopen is fetched straight away
+                del self._state[ticker]
+            due = []
+            for ticker in tickers:
+                state = self._state.get(ticker)
+                if state is None:
+                    due.append((float('-inf'), ticker))
+                elif state[0] <= now:
+                    due.append((state[1], ticker))
+                elif state[2] == 0 and state[0] - now > self.interval and self.is_open(ticker, wall):
+                    # Parked for a closed market that has since opened
+                    due.append((state[1], ticker))
+            due.sort()
+            batch = [ticker for _, ticker in due[:self.max_batch]]
+            self.polled += len(batch)
+            self.skipped += len(tickers) - len(batch)
+            return batch
+
+    def record(self, tickers, fetched):
+        # fetched is {ticker: price} from the download, or None when the whole request failed
+        now = self.clock()
+        wall = datetime.datetime.now(datetime.timezone.utc)
+        with self._lock:
+            for ticker in tickers:
+                state = self._state.setdefault(ticker, [now, float('-inf'), 0])
+                if fetched is not None and fetched.get(ticker) is not None:
+                    state[1] = now
+                    state[2] = 0
+                    state[0] = now + (self.interval if self.is_open(ticker, wall) else self.closed_interval)
+                else:
+                    state[2] += 1
+                    # Exponent capped so a ticker that never prices can't overflow the float
+                    state[0] = now + min(self.max_backoff, self.interval * 2 ** min(state[2], MAX_DOUBLINGS))
+
+    def sleep_time(self):
+        # Seconds until the next ticker falls due, between 0.5s and interval, so new
+        # positions and opening bells are picked up within one interval
+        now = self.clock()
+        with self._lock:
+            next_due = min((state[0] for state in self._state.values()), default=now)
+        return min(self.interval, max(0.5, next_due - now))
+
+    def stats(self):
+        with self._lock:
+            return {
+                'tracked': len(self._state),
+                'backing_off': sum(1 for state in self._state.values() if state[2]),
+                'polled': self.polled,
+                'skipped': self.skipped,
+            }
@@ -0,0 +1,102 @@
+import threading
+
+GROUPS = []  # Every SingleFlight created, for the stats command
+
+
+class _Call:
+    __slots__ = ('done', 'result', 'error')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """Collapses concurrent fetches of the same key into one upstream call.
+
+    The first caller for a key runs the fetch; callers that arrive while it is in flight
+    wait and get the same result (or exception). Nothing is kept once the call finishes,
+    so this only removes duplicate work during bursts; caching is the caches' job.
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self._calls = {}  # key -> _Call in flight
+        self._lock = threading.Lock()
+        self.fetches = 0  # keys actually fetched
+        self.shared = 0   # keys served by a fetch someone else was already running
+        GROUPS.append(self)
+
+    def do(self, key, fn):
+        with self._lock:
+            call = self._calls.get(key)
+            owner = call is None
+            if owner:
+                call = self._calls[key] = _Call()
+                self.fetches += 1
+            else:
+                self.shared += 1
+        if not owner:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+        try:
+            call.result = fn()
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result
+
+    def do_many(self, keys, fetch):
+        # Batched form: fetch(keys) -> {key: value} runs once for the keys nobody else is
+        # fetching, and the rest wait on the calls already in flight (single or batched).
+        # Returns {key: value}; keys with no value, or whose shared fetch failed, are left out.
+        owned, waiting = [], []
+        with self._lock:
+            for key in dict.fromkeys(keys):
+                call = self._calls.get(key)
+                if call is None:
+                    call = self._calls[key] = _Call()
+                    owned.append((key, call))
+                else:
+                    waiting.append((key, call))
+            self.fetches += len(owned)
+            self.shared += len(waiting)
+        results = {}
+        if owned:
+            try:
+                fetched = fetch([key for key, _ in owned])
+                for key, call in owned:
+                    call.result = fetched.get(key)
+            except Exception as e:
+                for key, call in owned:
+                    call.error = e
+                raise
+            finally:
+                with self._lock:
+                    for key, _ in owned:
+                        del self._calls[key]
+                for _, call in owned:
+                    call.done.set()
+            results.update((key, call.result) for key, call in owned)
+        for key, call in waiting:
+            call.done.wait()
+            if call.error is None:
+                results[key] = call.result
+        return {key: value for key, value in results.items() if value is not None}
+
+    def stats(self):
+        with self._lock:
+            total = self.fetches + self.shared
+            return {
+                'fetches': self.fetches,
+                'shared': self.shared,
+                'shared_rate': (self.shared / total) if total else 0.0,
+                'in_flight': len(self._calls),
+            }
@@ -0,0 +1,312 @@
+import csv
+import os
+import sqlite3
+import threading
+
+from journal import Journal, COMPACT_EVERY
+
+STARTING_CASH = 100000
+
+# Account state as passed between PaperTradingAccount and a storage backend:
+# {'tickers': [...], 'qtys': [...], 'costs': [...], 'cash': float, 'realized_pl': float}
+
+# Resting orders are passed as tuples in this column order (see orders.Order)
+ORDER_COLUMNS = ['id', 'op', 'ticker', 'kind', 'amount', 'limit', 'stop', 'triggered']
+
+
+class CsvStorage:
+    """positions/cash CSV files as the snapshot, plus the append-only fill journal."""
+
+    def __init__(self, portfolio_id=None):
+        if portfolio_id and portfolio_id != 1:
+            self.positions_file = f'positions_{portfolio_id}.csv'
+            self.cash_file = f'cash_{portfolio_id}.csv'
+            journal_file = f'journal_{portfolio_id}.log'
+            self.orders_file = f'orders_{portfolio_id}.csv'
+        else:
+            self.positions_file = 'positions.csv'
+            self.cash_file = 'cash.csv'
+            journal_file = 'journal.log'
+            self.orders_file = 'orders.csv'
+        self.journal = Journal(journal_file)
+
+    def load(self):
+        # State from the latest snapshot rolled forward through the journal, None if nothing is stored
+        snapshot_seq = 0
+        positions = {}  # ticker -> (qty, cost), insertion ordered
+        state = None
+        try:
+            # Plain csv rather than pandas keeps startup light (and never turns a ticker like NA into NaN)
+            rows = read_csv(self.positions_file)
+            positions = {r['Ticker']: (float(r['Quantity']), float(r.get('PurchasePrice') or 0.0)) for r in rows}
+            row = read_csv(self.cash_file)[0]
+            state = {'cash': float(row['Cash']), 'realized_pl': float(row.get('RealizedPL') or 0.0)}
+            if row.get('JournalSeq'):
+                snapshot_seq = int(float(row['JournalSeq']))
+        except FileNotFoundError:
+            positions = {}
+        # Roll forward any fills made after the snapshot (e.g. before a crash)
+        records = self.journal.replay(after_seq=snapshot_seq)
+        self.journal.seq = max(self.journal.seq, snapshot_seq)
+        if state is None and not records:
+            return None
+        state = state or {'cash': STARTING_CASH, 'realized_pl': 0.0}
+        for record in records:
+            # Records carry the resulting position and balances, so replay is just assignment
+            if record['qty'] == 0:
+                positions.pop(record['ticker'], None)
+            else:
+                positions[record['ticker']] = (record['qty'], record['cost'])
+            state['cash'] = record['cash']
+            state['realized_pl'] = record['realized_pl']
+        state['tickers'] = [t for t in positions]
+        state['qtys'] = [qty for qty, _ in positions.values()]
+        state['costs'] = [cost for _, cost in positions.values()]
+        return state
+
+    def checkpoint(self):
+        # Journal position to pass to save(); taken before the state so the state covers it
+        return self.journal.seq
+
+    def save(self, state, changes=None, checkpoint=None):
+        # Snapshot; the journal records it covers can then be dropped. The positions file is
+        # skipped when changes says no position moved. The cash file is small and always written
+        # since it records the journal seq.
+        if changes is None or changes['positions'] or not os.path.exists(self.positions_file):
+            write_csv_atomic(self.positions_file, ['Ticker', 'Quantity', 'PurchasePrice'],
+                             zip(state['tickers'], state['qtys'], state['costs']))
+        seq = self.journal.seq if checkpoint is None else checkpoint
+        write_csv_atomic(self.cash_file, ['Cash', 'RealizedPL', 'JournalSeq'], [(state['cash'], state['realized_pl'], seq)])
+        self.journal.reset(upto=seq)
+
+    def record_fill(self, record):
+        # Returns True once enough fills have piled up that the owner should save a snapshot
+        return self.record_fills([record])
+
+    def record_fills(self, records):
+        # A basket's fills as one journal write, replayed all or nothing
+        self.journal.append_many(records)
+        return self.journal.pending >= COMPACT_EVERY
+
+    def load_orders(self):
+        try:
+            rows = read_csv(self.orders_file)
+        except FileNotFoundError:
+            return []
+        return [order_row([r[c] for c in ORDER_COLUMNS]) for r in rows]
+
+    def save_orders(self, orders):
+        # The whole set of resting orders; small enough to rewrite on every change
+        write_csv_atomic(self.orders_file, ORDER_COLUMNS,
+                         [['' if v is None else int(v) if isinstance(v, bool) else v for v in o] for o in orders])
+
+    def close(self):
+        self.journal.close()
+
+
+class SqliteStorage:
+    """All portfolios in one SQLite database (WAL mode) with per-row updates.
+
+    A fill touches one position row, the account row and appends one fills row in a single
+    transaction. Positions and fills are indexed by ticker for cross-portfolio queries.
+    """
+
+    def __init__(self, portfolio_id=None, path=None):
+        self.account_id = portfolio_id or 1
+        self.portfolio_id = portfolio_id
+        self.path = path or os.environ.get('PT_DB', 'papertrading.db')
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS accounts (
+                id INTEGER PRIMARY KEY,
+                cash REAL NOT NULL,
+                realized_pl REAL NOT NULL DEFAULT 0
+            );
+            CREATE TABLE IF NOT EXISTS positions (
+                account_id INTEGER NOT NULL REFERENCES accounts(id),
+                ticker TEXT NOT NULL,
+                quantity REAL NOT NULL,
+                purchase_price REAL NOT NULL,
+                PRIMARY KEY (account_id, ticker)
+            );
+            CREATE INDEX IF NOT EXISTS positions_by_ticker ON positions(ticker);
+            CREATE TABLE IF NOT EXISTS fills (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                account_id INTEGER NOT NULL REFERENCES accounts(id),
+                ts TEXT NOT NULL,
+                op TEXT NOT NULL,
+                ticker TEXT NOT NULL,
+                price REAL NOT NULL,
+                amount REAL NOT NULL,
+                quantity REAL NOT NULL,
+                purchase_price REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS fills_by_ticker ON fills(ticker, ts);
+            CREATE INDEX IF NOT EXISTS fills_by_account ON fills(account_id, id);
+            CREATE TABLE IF NOT EXISTS orders (
+                account_id INTEGER NOT NULL,
+                id INTEGER NOT NULL,
+                op TEXT NOT NULL,
+                ticker TEXT NOT NULL,
+                kind TEXT NOT NULL,
+                amount REAL,
+                limit_price REAL,
+                stop_price REAL,
+                triggered INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (account_id, id)
+            );
+        """)
+
+    def load(self):
+        with self._lock:
+            row = self._conn.execute('SELECT cash, realized_pl FROM accounts WHERE id=?', (self.account_id,)).fetchone()
+            rows = self._conn.execute(
+                'SELECT ticker, quantity, purchase_price FROM positions WHERE account_id=? ORDER BY rowid',
+                (self.account_id,)).fetchall()
+        if row is None:
+            # First use of the database for this portfolio: carry over its CSV files if there are any
+            csv_storage = CsvStorage(self.portfolio_id)
+            state = csv_storage.load()
+            if state is not None:
+                self.save(state)
+                self.save_orders(csv_storage.load_orders())
+            return state
+        return {
+            'tickers': [r[0] for r in rows],
+            'qtys': [r[1] for r in rows],
+            'costs': [r[2] for r in rows],
+            'cash': row[0],
+            'realized_pl': row[1],
+        }
+
+    def checkpoint(self):
+        return None
+
+    def save(self, state, changes=None, checkpoint=None):
+        # Fills already keep the rows current, so this only matters for migration or when
+        # changes lists tickers; None means a full sync
+        with self._lock, self._conn:
+            self._upsert_account(state['cash'], state['realized_pl'])
+            if changes is not None:
+                positions = dict(zip(state['tickers'], zip(state['qtys'], state['costs'])))
+                for ticker in changes['positions']:
+                    if ticker in positions:
+                        self._conn.execute(
+                            'INSERT INTO positions VALUES (?, ?, ?, ?) '
+                            'ON CONFLICT(account_id, ticker) DO UPDATE SET quantity=excluded.quantity, purchase_price=excluded.purchase_price',
+                            (self.account_id, ticker) + positions[ticker])
+                    else:
+                        self._conn.execute('DELETE FROM positions WHERE account_id=? AND ticker=?', (self.account_id, ticker))
+                return
+            held = set(state['tickers'])
+            stored = [r[0] for r in self._conn.execute('SELECT ticker FROM positions WHERE account_id=?', (self.account_id,))]
+            self._conn.executemany('DELETE FROM positions WHERE account_id=? AND ticker=?',
+                                   [(self.account_id, t) for t in stored if t not in held])
+            self._conn.executemany(
+                'INSERT INTO positions VALUES (?, ?, ?, ?) '
+                'ON CONFLICT(account_id, ticker) DO UPDATE SET quantity=excluded.quantity, purchase_price=excluded.purchase_price',
+                [(self.account_id, t, q, c) for t, q, c in zip(state['tickers'], state['qtys'], state['costs'])])
+
+    def record_fill(self, record):
+        return self.record_fills([record])
+
+    def record_fills(self, records):
+        # Every fill of a basket in one transaction
+        with self._lock, self._conn:
+            for record in records:
+                self._write_fill(record)
+        # Rows are always current, there is no log to compact
+        return False
+
+    def _write_fill(self, record):
+        self._upsert_account(record['cash'], record['realized_pl'])
+        if record['qty'] == 0:
+            self._conn.execute('DELETE FROM positions WHERE account_id=? AND ticker=?', (self.account_id, record['ticker']))
+        else:
+            self._conn.execute(
+                'INSERT INTO positions VALUES (?, ?, ?, ?) '
+                'ON CONFLICT(account_id, ticker) DO UPDATE SET quantity=excluded.quantity, purchase_price=excluded.purchase_price',
+                (self.account_id, record['ticker'], record['qty'], record['cost']))
+        self._conn.execute(
+            'INSERT INTO fills (account_id, ts, op, ticker, price, amount, quantity, purchase_price) VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+            (self.account_id, record['ts'], record['op'], record['ticker'], record['price'], record['amount'], record['qty'], record['cost']))
+
+    def _upsert_account(self, cash, realized_pl):
+        self._conn.execute(
+            'INSERT INTO accounts VALUES (?, ?, ?) ON CONFLICT(id) DO UPDATE SET cash=excluded.cash, realized_pl=excluded.realized_pl',
+            (self.account_id, cash, realized_pl))
+
+    def load_orders(self):
+        with self._lock:
+            rows = self._conn.execute(
+                'SELECT id, op, ticker, kind, amount, limit_price, stop_price, triggered FROM orders WHERE account_id=? ORDER BY id',
+                (self.account_id,)).fetchall()
+        return [order_row(r) for r in rows]
+
+    def save_orders(self, orders):
+        with self._lock, self._conn:
+            self._conn.execute('DELETE FROM orders WHERE account_id=?', (self.account_id,))
+            self._conn.executemany('INSERT INTO orders VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                                   [(self.account_id,) + tuple(o) for o in orders])
+
+    def positions_by_ticker(self, ticker):
+        # [(account_id, quantity, purchase_price)] across every portfolio holding ticker
+        with self._lock:
+            return self._conn.execute(
+                'SELECT account_id, quantity, purchase_price FROM positions WHERE ticker=? ORDER BY account_id', (ticker,)).fetchall()
+
+    def fills(self, ticker=None, all_accounts=False):
+        # Fill history, oldest first, as (account_id, ts, op, ticker, price, amount)
+        sql = 'SELECT account_id, ts, op, ticker, price, amount FROM fills'
+        where, params = [], []
+        if not all_accounts:
+            where.append('account_id=?')
+            params.append(self.account_id)
+        if ticker is not None:
+            where.append('ticker=?')
+            params.append(ticker)
+        if where:
+            sql += ' WHERE ' + ' AND '.join(where)
+        with self._lock:
+            return self._conn.execute(sql + ' ORDER BY id', params).fetchall()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+def read_csv(path):
+    with open(path, newline='') as f:
+        return [row for row in csv.DictReader(f)]
+
+
+def order_row(values):
+    # Stored order columns (strings from CSV, or SQLite values) -> typed tuple
+    order_id, op, ticker, kind, amount, limit, stop, triggered = values
+    number = lambda v: None if v in (None, '') else float(v)
+    return (int(order_id), op, ticker, kind, number(amount), number(limit), number(stop), bool(int(triggered or 0)))
+
+
+def write_csv_atomic(path, header, rows):
+    # Write to a temp file and rename over the target, so a crash never leaves a half-written CSV
+    tmp = path + '.tmp'
+    with open(tmp, 'w', newline='') as f:
+        writer = csv.writer(f, lineterminator='\n')
+        writer.writerow(header)
+        writer.writerows(rows)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+def open_storage(portfolio_id=None, kind=None):
+    # kind is 'csv' (default) or 'sqlite'; PT_STORAGE picks it when not given
+    kind = (kind or os.environ.get('PT_STORAGE', 'csv')).lower()
+    if kind == 'sqlite':
+        return SqliteStorage(portfolio_id)
+    if kind == 'csv':
+        return CsvStorage(portfolio_id)
+    raise ValueError(f"Unknown storage backend {kind}")
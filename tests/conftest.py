@@ -0,0 +1,18 @@
+import os
+import sys
+
+import pytest
+
+# The modules live flat in the repository root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture
+def workdir(tmp_path, monkeypatch):
+    # CSV storage writes into the working directory; prices come from SyntheticProvider
+    from marketdata import SyntheticProvider, set_provider
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.delenv('PT_STORAGE', raising=False)
+    set_provider(SyntheticProvider())
+    yield tmp_path
+    set_provider(None)
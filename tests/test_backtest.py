@@ -0,0 +1,83 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import backtest
+from papertrading import trade_rules
+
+
+def scalar_backtest(prices, orders, cash):
+    # One trade_rules() call per order, in the engine's op order and ticker order
+    positions, realized, fills = {}, 0.0, 0
+    for i in range(len(prices)):
+        for op in backtest.OPS:
+            if op not in orders:
+                continue
+            for j, ticker in enumerate(prices.columns):
+                amount = orders[op].iat[i, j]
+                if not amount:
+                    continue
+                p = prices.iat[i, j]
+                ok, result = trade_rules(op, ticker, positions.get(ticker), cash, None if np.isnan(p) else p,
+                                         None if op == 'sellall' else amount)
+                if not ok:
+                    continue
+                qty, cost, cash, pl, _ = result
+                realized += pl
+                fills += 1
+                if qty == 0:
+                    positions.pop(ticker, None)
+                else:
+                    positions[ticker] = (qty, cost)
+    return positions, cash, realized, fills
+
+
+def random_stream(seed, n_bars=120, n_tickers=6):
+    rng = np.random.default_rng(seed)
+    tickers = [f'T{j}' for j in range(n_tickers)]
+    index = pd.bdate_range('2024-01-01', periods=n_bars)
+    prices = pd.DataFrame(50 * np.exp(np.cumsum(rng.normal(0, 0.02, (n_bars, n_tickers)), axis=0)),
+                          index=index, columns=tickers)
+    prices = prices.mask(rng.random(prices.shape) < 0.05)  # some bars without a price
+    orders = {}
+    for op in backtest.OPS:
+        active = rng.random(prices.shape) < 0.15
+        amounts = np.round(rng.uniform(100, 20_000, prices.shape), 2)
+        orders[op] = pd.DataFrame(np.where(active, 1.0 if op == 'sellall' else amounts, 0.0),
+                                  index=index, columns=tickers)
+    return prices, orders
+
+
+@pytest.mark.parametrize('seed', range(20))
+def test_matches_trade_rules_on_random_streams(seed):
+    prices, orders = random_stream(seed)
+    result = backtest.run(prices, orders, cash=50_000.0)
+    positions, cash, realized, fills = scalar_backtest(prices, orders, 50_000.0)
+
+    assert result.cash == pytest.approx(cash)
+    assert result.realized_pl == pytest.approx(realized, abs=1e-6)
+    assert len(result.trades) == fills
+    held = result.qty[result.qty != 0]
+    assert sorted(held.index) == sorted(positions)
+    for ticker, (qty, cost) in positions.items():
+        assert result.qty[ticker] == pytest.approx(qty)
+        assert result.cost[ticker] == pytest.approx(cost)
+
+
+def test_buys_over_cash_are_funded_in_ticker_order():
+    # 600 of cash: A (300) fits, B (400) does not, C (200) still fits in what is left
+    assert backtest._funded(np.array([300.0, 400.0, 200.0]), 600.0).tolist() == [True, False, True]
+    assert backtest._funded(np.array([300.0, 0.0, 200.0]), 600.0).tolist() == [True, True, True]
+
+    prices = pd.DataFrame([[10.0, 20.0, 40.0]], columns=['A', 'B', 'C'])
+    buys = pd.DataFrame([[300.0, 400.0, 200.0]], columns=['A', 'B', 'C'])
+    result = backtest.run(prices, {'buy': buys}, cash=600.0)
+    assert result.qty.tolist() == [30.0, 0.0, 5.0]
+    assert result.cash == 100.0
+    assert result.trades['ticker'].tolist() == ['A', 'C']
+
+
+def test_unknown_op_is_rejected():
+    prices = pd.DataFrame([[10.0]], columns=['A'])
+    with pytest.raises(ValueError):
+        backtest.run(prices, {'hold': prices})
@@ -0,0 +1,65 @@
+import os
+
+import pytest
+
+from journal import Journal
+from papertrading import PaperTradingAccount, load_basket, parse_basket
+
+
+def test_parse_basket_accepts_either_order_and_separator():
+    assert parse_basket('buy aapl 10k, sell 5k MSFT; sellall NVDA') == [
+        ('buy', 'AAPL', 10_000.0), ('sell', 'MSFT', 5_000.0), ('sellall', 'NVDA', None)]
+
+
+@pytest.mark.parametrize('text', [
+    'buy T0001',                # no amount
+    'hold T0001 100',           # unknown op
+    'buy T0001 100 now',        # extra word
+    'buy T0001 lots',           # amount isn't a number
+    'buy T0001 100, sell',      # second order cut short
+])
+def test_parse_basket_rejects_malformed_orders(text):
+    with pytest.raises(ValueError):
+        parse_basket(text)
+
+
+def test_load_basket_from_csv(tmp_path):
+    path = tmp_path / 'basket.csv'
+    path.write_text('op,ticker,amount\nbuy,T0001,2.5k\nsellall,T0002,\n')
+    assert load_basket(str(path)) == [('buy', 'T0001', 2500.0), ('sellall', 'T0002', None)]
+
+
+def test_basket_fills_every_order_in_one_journal_batch(workdir):
+    account = PaperTradingAccount()
+    account.load()
+    ok, messages = account.execute_batch(parse_basket('buy T0001 1000, short T0002 500, buy T0001 500'))
+    assert ok and len(messages) == 3
+    assert account.positions.tickers == ('T0001', 'T0002')
+    assert account.get_cash() == 100_000 - 1000 + 500 - 500
+    account.storage.close()
+    records = Journal(account.storage.journal.path).replay()
+    assert [r['batch'] for r in records] == [[0, 3], [1, 3], [2, 3]]
+
+
+def test_rejected_leg_leaves_account_untouched(workdir):
+    account = PaperTradingAccount()
+    account.load()
+    assert account.buy('T0001', 1000)[0]
+    before = account.state()
+    journal_size = os.path.getsize(account.storage.journal.path)
+
+    # The second leg sells a position that doesn't exist, the third needs more cash than there is
+    ok, messages = account.execute_batch(parse_basket('buy T0003 100, sell T0004 50, buy T0005 1m'))
+    assert not ok
+    assert messages[-1] == 'Basket rejected, nothing was traded.'
+    assert [m.split(':')[0] for m in messages[:-1]] == ['Order 2 (sell T0004)', 'Order 3 (buy T0005)']
+    assert account.state() == before
+    assert os.path.getsize(account.storage.journal.path) == journal_size
+
+
+def test_empty_or_unknown_basket_is_refused(workdir):
+    account = PaperTradingAccount()
+    account.load()
+    assert account.execute_batch([]) == (False, ['Basket is empty'])
+    assert account.execute_batch([('hold', 'T0001', 1.0)]) == (False, ['Unknown order type hold'])
+    assert account.state()['tickers'] == []
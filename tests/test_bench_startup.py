@@ -0,0 +1,12 @@
+import tempfile
+
+import bench_startup
+
+
+def test_cli_child_runs():
+    # papertrading.py started, listed and exited in a child process, on synthetic prices
+    with tempfile.TemporaryDirectory() as workdir, tempfile.TemporaryDirectory() as pycache:
+        bench_startup.seed_portfolio(workdir, 5)
+        phases = bench_startup.run_child('cli', workdir, pycache)
+    assert set(phases) == {'import', 'load', 'ready', 'first_list'}
+    assert all(seconds >= 0 for seconds in phases.values())
@@ -0,0 +1,20 @@
+import pt
+from bench_trading import headless_app, make_account
+from marketdata import get_provider
+
+
+def test_headless_app_sorts_the_real_columns(workdir):
+    account = make_account(12, get_provider())
+    app = headless_app(account)
+    assert app.tree['columns'] == pt.PORTFOLIO_COLUMNS
+    app.render_portfolio(app.build_snapshot())
+    assert len(app.tree.get_children()) == 12
+    for col in pt.PORTFOLIO_COLUMNS:
+        app.sort_by_column(col)
+    # Last sort was ascending on Daily P/L(%): N/A rows go last, the rest in order
+    col = pt.PORTFOLIO_COLUMNS.index('Daily P/L(%)')
+    tickers = {item: t for t, item in app._row_items.items()}
+    keys = [app._row_keys[tickers[item]][col] for item in app.tree.get_children()]
+    present = [k for k in keys if k is not None]
+    assert present == sorted(present) and keys[:len(present)] == present
+    account.storage.close()
@@ -0,0 +1,101 @@
+import os
+import threading
+import time
+
+import storage
+from journal import Journal
+from papertrading import PaperTradingAccount
+from storage import CsvStorage
+
+
+def fill(ticker, qty, cash):
+    return {'op': 'buy', 'ticker': ticker, 'qty': qty, 'cost': 10.0, 'cash': cash, 'realized_pl': 0.0}
+
+
+def test_replay_returns_records_after_seq(tmp_path):
+    path = str(tmp_path / 'journal.log')
+    journal = Journal(path)
+    journal.append(fill('AAPL', 1.0, 990.0))
+    journal.append_many([fill('MSFT', 1.0, 980.0), fill('NVDA', 1.0, 970.0)])
+    journal.close()
+    records = Journal(path).replay(after_seq=1)
+    assert [(r['seq'], r['ticker']) for r in records] == [(2, 'MSFT'), (3, 'NVDA')]
+    assert [r['batch'] for r in records] == [[0, 2], [1, 2]]
+
+
+def test_torn_record_is_truncated(tmp_path):
+    path = str(tmp_path / 'journal.log')
+    journal = Journal(path)
+    journal.append(fill('AAPL', 1.0, 990.0))
+    journal.append(fill('MSFT', 1.0, 980.0))
+    journal.close()
+    good = len(open(path, 'rb').readline())
+    with open(path, 'r+b') as f:
+        f.truncate(good + 10)  # crash halfway through the second record
+
+    journal = Journal(path)
+    assert [r['ticker'] for r in journal.replay()] == ['AAPL']
+    assert os.path.getsize(path) == good
+    # New appends start on a clean line and continue the sequence
+    journal.append(fill('NVDA', 1.0, 970.0))
+    journal.close()
+    assert [(r['seq'], r['ticker']) for r in Journal(path).replay()] == [(1, 'AAPL'), (2, 'NVDA')]
+
+
+def test_partial_batch_is_dropped(tmp_path):
+    path = str(tmp_path / 'journal.log')
+    journal = Journal(path)
+    journal.append(fill('AAPL', 1.0, 990.0))
+    journal.append_many([fill('MSFT', 1.0, 980.0), fill('NVDA', 1.0, 970.0), fill('AMD', 1.0, 960.0)])
+    journal.close()
+    with open(path, 'rb') as f:
+        lines = f.readlines()
+    with open(path, 'wb') as f:
+        f.writelines(lines[:3])  # two of the basket's three lines made it to disk
+
+    assert [r['ticker'] for r in Journal(path).replay()] == ['AAPL']
+    assert os.path.getsize(path) == len(lines[0])
+
+
+def test_load_rolls_snapshot_forward_through_journal(workdir):
+    csv = CsvStorage()
+    csv.save({'tickers': ['AAPL'], 'qtys': [1.0], 'costs': [10.0], 'cash': 990.0, 'realized_pl': 0.0},
+             checkpoint=csv.checkpoint())
+    csv.record_fill(fill('MSFT', 2.0, 970.0))
+    csv.record_fills([fill('AAPL', 0, 985.0), fill('NVDA', 1.0, 975.0)])
+    csv.close()
+    with open(csv.journal.path, 'ab') as f:
+        f.write(b'{"op": "buy", "tick')  # torn tail
+
+    state = CsvStorage().load()
+    assert dict(zip(state['tickers'], state['qtys'])) == {'MSFT': 2.0, 'NVDA': 1.0}
+    assert state['cash'] == 975.0
+
+
+def test_compaction_runs_on_autosave_thread(workdir, monkeypatch):
+    monkeypatch.setattr(storage, 'COMPACT_EVERY', 3)
+    account = PaperTradingAccount(autosave=60.0)
+    account.load()
+    saved_on = []
+    save = account.storage.save
+
+    def recording_save(*args):
+        save(*args)
+        saved_on.append(threading.current_thread())
+
+    account.storage.save = recording_save
+    for ticker in ('T0001', 'T0002', 'T0003'):
+        assert account.buy(ticker, 100)[0]
+    deadline = time.monotonic() + 5
+    while not saved_on and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert saved_on and saved_on[0] is not threading.main_thread()
+    assert account.storage.journal.pending == 0
+
+    account.buy('T0004', 100)
+    expected = account.state()
+    account.autosaver._timer.cancel()  # simulate a crash: the last fill is only in the journal
+    account.storage.close()
+    reloaded = PaperTradingAccount()
+    reloaded.load()
+    assert reloaded.state() == expected
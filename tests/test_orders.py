@@ -0,0 +1,92 @@
+import pytest
+
+from orders import Order, OrderBook
+from papertrading import PaperTradingAccount
+
+
+def order(op, kind, limit=None, stop=None, ticker='AAPL', amount=100.0):
+    return Order(None, op, ticker, kind, amount, limit, stop, False)
+
+
+@pytest.mark.parametrize('op, kind, limit, stop, quiet, fires', [
+    ('buy', 'limit', 100.0, None, 101.0, 100.0),    # buy limit: at or below the limit
+    ('sell', 'limit', 100.0, None, 99.0, 100.0),    # sell limit: at or above the limit
+    ('buy', 'stop', None, 100.0, 99.0, 100.0),      # buy stop: at or above the stop
+    ('sell', 'stop', None, 100.0, 101.0, 100.0),    # sell stop: at or below the stop
+    ('cover', 'limit', 100.0, None, 100.5, 99.0),
+    ('short', 'stop', None, 100.0, 100.5, 99.0),
+])
+def test_trigger_side_per_order_type(op, kind, limit, stop, quiet, fires):
+    book = OrderBook()
+    placed = book.add(order(op, kind, limit, stop))
+    assert book.match('AAPL', quiet) == []
+    assert book.match('AAPL', fires) == [placed]
+    assert len(book) == 0 and book.tickers() == []
+
+
+def test_stop_limit_rests_on_limit_after_stop():
+    book = OrderBook()
+    placed = book.add(order('sell', 'stoplimit', limit=95.0, stop=98.0))
+    # Stop and limit both hit by the same price: fills at once
+    assert book.match('AAPL', 97.0) == [placed._replace(triggered=True)]
+
+    book = OrderBook()
+    placed = book.add(order('buy', 'stoplimit', limit=101.0, stop=100.0))
+    assert book.match('AAPL', 102.0) == []  # stop hit, above the limit: now a buy limit at 101
+    assert book.orders[placed.id].triggered
+    assert book.match('AAPL', 101.5) == []
+    assert book.match('AAPL', 101.0) == [placed._replace(triggered=True)]
+
+
+def test_match_fires_in_trigger_order_and_leaves_the_rest():
+    book = OrderBook()
+    far = book.add(order('buy', 'limit', limit=90.0))
+    near = book.add(order('buy', 'limit', limit=95.0))
+    other = book.add(order('buy', 'limit', limit=95.0, ticker='MSFT'))
+    assert book.match('AAPL', 94.0) == [near]
+    assert book.match('AAPL', 89.0) == [far]
+    assert book.tickers() == ['MSFT'] and book.orders == {other.id: other}
+
+
+def test_cancel_skips_stale_heap_entries_and_rebuilds():
+    book = OrderBook()
+    placed = [book.add(order('buy', 'limit', limit=float(p))) for p in range(1, 201)]
+    kept = placed[0]
+    for o in placed[1:]:
+        assert book.cancel(o.id) == o
+    assert book.cancel(placed[1].id) is None
+    # The lazy rebuild dropped the cancelled entries once they outnumbered the live ones
+    assert book._stale <= 64
+    assert sum(len(h) for h in book._heaps['AAPL'].values()) == book._stale + 1
+    assert book.match('AAPL', 150.0) == []
+    assert book.match('AAPL', 1.0) == [kept]
+
+
+def test_check_orders_fills_at_triggering_price(workdir):
+    account = PaperTradingAccount()
+    account.load()
+    ok, _ = account.place_order('buy', 'AAPL', 1000.0, 'limit', limit=50.0)
+    assert ok
+    assert account.check_orders({'AAPL': 51.0}) == []
+    [(ok, msg)] = account.check_orders({'AAPL': 40.0})
+    assert ok and msg.startswith('Order #1 filled')
+    assert account.positions.get('AAPL') == (25.0, 40.0)
+    assert account.open_orders() == []
+
+
+def test_orders_round_trip_through_storage(workdir):
+    account = PaperTradingAccount()
+    account.load()
+    account.place_order('buy', 'AAPL', 500.0, 'limit', limit=50.0)
+    account.place_order('sellall', 'MSFT', None, 'stoplimit', limit=96.0, stop=95.0)
+    account.place_order('short', 'NVDA', 200.0, 'stop', stop=10.0)
+    account.cancel_order(3)
+    account.check_orders({'MSFT': 94.0})  # stop hit, still resting on its limit
+    account.close()
+
+    reloaded = PaperTradingAccount()
+    reloaded.load()
+    assert reloaded.open_orders() == account.open_orders()
+    assert [o.triggered for o in reloaded.open_orders()] == [False, True]
+    # New ids continue after the loaded ones
+    assert reloaded.place_order('buy', 'AAPL', 1.0, 'limit', limit=1.0)[1].startswith('Placed order #3')
@@ -0,0 +1,46 @@
+import random
+
+from pt import plan_moves
+
+
+def apply(current, moves):
+    # Replays moves the way Treeview.move does: detach, then insert at index
+    order = list(current)
+    for item, index in moves:
+        order.remove(item)
+        order.insert(index, item)
+    return order
+
+
+def test_no_moves_when_already_sorted():
+    assert plan_moves(['a', 'b', 'c'], ['a', 'b', 'c']) == []
+
+
+def test_single_row_moves_once():
+    current = ['a', 'b', 'c', 'd', 'e']
+    target = ['a', 'c', 'd', 'b', 'e']
+    moves = plan_moves(current, target)
+    assert moves == [('b', 3)]
+    assert apply(current, moves) == target
+
+
+def test_random_orders_are_reached():
+    rng = random.Random(0)
+    for _ in range(500):
+        current = [f'T{i}' for i in range(rng.randint(0, 40))]
+        target = list(current)
+        if rng.random() < 0.5:
+            rng.shuffle(target)
+        else:
+            for _ in range(rng.randint(1, 4)):
+                if len(target) > 1:
+                    a, b = rng.sample(range(len(target)), 2)
+                    target[a], target[b] = target[b], target[a]
+        assert apply(current, plan_moves(current, target)) == target
+
+
+def test_reverse_of_many_rows():
+    current = [f'T{i}' for i in range(10000)]
+    moves = plan_moves(current, current[::-1])
+    assert len(moves) == len(current)
+    assert apply(current[:300], plan_moves(current[:300], current[:300][::-1])) == current[:300][::-1]
@@ -0,0 +1,15 @@
+from positionbook import PositionBook
+
+
+def test_balances_are_published_with_positions():
+    book = PositionBook()
+    book.set_balance(1000.0, 0.0)
+    before = book.positions
+    with book.batch():
+        book.set('AAPL', 2.0, 100.0)
+        book.set_balance(800.0, 5.0)
+        # Nothing is published until the batch ends
+        assert book.positions is before
+    after = book.positions
+    assert (before.cash, before.realized_pl, len(before)) == (1000.0, 0.0, 0)
+    assert (after.cash, after.realized_pl, after.get('AAPL')) == (800.0, 5.0, (2.0, 100.0))
@@ -0,0 +1,78 @@
+import datetime
+
+import pandas as pd
+
+import pricecache
+from marketdata import YFinanceProvider
+from pricecache import PrevCloseCache
+from scheduler import exchange_date
+
+
+class FakeYFinance(YFinanceProvider):
+    # Serves fixed daily closes instead of downloading
+    def __init__(self, closes):
+        self.closes = closes
+
+    def _download_closes(self, tickers, period, interval):
+        return {t: self.closes[t] for t in tickers if t in self.closes}
+
+
+def daily_closes(ticker, values, include_today=False):
+    # Bars for the sessions before today's exchange date, optionally plus a partial bar for today
+    today = pd.Timestamp(exchange_date(ticker))
+    index = pd.bdate_range(end=today - pd.Timedelta(days=1), periods=len(values))
+    closes = pd.Series(values, index=index.tz_localize('America/New_York'), dtype=float)
+    if include_today:
+        closes[today.tz_localize('America/New_York')] = 999.0
+    return closes
+
+
+def test_pre_open_uses_last_session():
+    # Before the open the newest bar is the last session, which is the previous close
+    provider = FakeYFinance({'AAPL': daily_closes('AAPL', [100.0, 101.0, 102.0])})
+    assert provider.previous_closes(['AAPL']) == {'AAPL': 102.0}
+
+
+def test_during_session_skips_todays_bar():
+    provider = FakeYFinance({'AAPL': daily_closes('AAPL', [100.0, 101.0, 102.0], include_today=True)})
+    assert provider.previous_closes(['AAPL']) == {'AAPL': 102.0}
+
+
+def test_no_bar_before_today_is_left_out():
+    closes = pd.Series([999.0], index=pd.DatetimeIndex([pd.Timestamp(exchange_date('AAPL'))]))
+    assert FakeYFinance({'AAPL': closes}).previous_closes(['AAPL']) == {}
+
+
+def test_cache_refetches_when_exchange_date_rolls(monkeypatch):
+    dates = {'today': datetime.date(2024, 6, 10)}
+    monkeypatch.setattr(pricecache, 'exchange_dates', lambda tickers: {t: dates['today'] for t in tickers})
+    fetches = []
+
+    def fetch(tickers):
+        fetches.append(tickers)
+        return {t: float(len(fetches)) for t in tickers}
+
+    cache = PrevCloseCache()
+    assert cache.get_many(['AAPL'], fetch) == {'AAPL': 1.0}
+    assert cache.get_many(['AAPL'], fetch) == {'AAPL': 1.0}
+    dates['today'] = datetime.date(2024, 6, 11)
+    assert cache.get_many(['AAPL'], fetch) == {'AAPL': 2.0}
+    assert fetches == [['AAPL'], ['AAPL']]
+
+
+def test_cache_retries_tickers_missing_from_a_fetch(monkeypatch):
+    monkeypatch.setattr(pricecache, 'exchange_dates', lambda tickers: {t: datetime.date(2024, 6, 10) for t in tickers})
+    clock = {'now': 0.0}
+    fetches = []
+
+    def fetch(tickers):
+        # First batch comes back partial: MSFT is missing
+        fetches.append(tickers)
+        return {t: 1.0 for t in tickers if t == 'AAPL' or len(fetches) > 1}
+
+    cache = PrevCloseCache(negative_ttl=60.0, clock=lambda: clock['now'])
+    assert cache.get_many(['AAPL', 'MSFT'], fetch) == {'AAPL': 1.0, 'MSFT': None}
+    assert cache.get_many(['AAPL', 'MSFT'], fetch) == {'AAPL': 1.0, 'MSFT': None}
+    clock['now'] = 61.0
+    assert cache.get_many(['AAPL', 'MSFT'], fetch) == {'AAPL': 1.0, 'MSFT': 1.0}
+    assert fetches == [['AAPL', 'MSFT'], ['MSFT']]
@@ -0,0 +1,29 @@
+from scheduler import PollScheduler
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_backoff_is_capped_after_many_failures():
+    clock = Clock()
+    scheduler = PollScheduler(interval=5.0, max_backoff=300.0, is_open=lambda t, now: True, clock=clock)
+    for _ in range(5000):
+        scheduler.record(['BAD'], None)
+    assert scheduler._state['BAD'][0] == clock.now + 300.0
+    assert scheduler.stats()['backing_off'] == 1
+
+
+def test_success_resets_backoff():
+    clock = Clock()
+    scheduler = PollScheduler(interval=5.0, is_open=lambda t, now: True, clock=clock)
+    scheduler.record(['AAPL'], None)
+    scheduler.record(['AAPL'], {'AAPL': 1.0})
+    assert scheduler._state['AAPL'][2] == 0
+    assert scheduler._state['AAPL'][0] == clock.now + 5.0
+    clock.now += 5.0
+    assert scheduler.due(['AAPL']) == ['AAPL']
@@ -0,0 +1,82 @@
+from collections import namedtuple
+
+from lazy import lazy_import
+from metrics import span
+
+np = lazy_import('numpy')
+
+# Per-position arrays (aligned with the inputs, NaN where a price is missing) plus portfolio totals.
+# value is signed: negative for shorts, the way the tables display it.
+Valuation = namedtuple('Valuation', [
+    'price', 'value', 'pl', 'pl_pct', 'daily_pct', 'long', 'short', 'priced',
+    'total_unrealized_pl', 'total_invested', 'total_value',
+])
+
+
+@span('valuation')
+def value_positions(qty, cost, prices, prev_closes=None):
+    """Value every position in one vectorized pass.
+
+    qty, cost and prices are equal-length arrays (prices NaN when unavailable); prev_closes
+    is optional and only needed for daily_pct. Same rules as the old per-row loops: longs
+    earn price - cost, shorts earn cost - price, flat rows are 0.
+    """
+    qty = np.asarray(qty, dtype=float)
+    cost = np.asarray(cost, dtype=float)
+    prices = np.asarray(prices, dtype=float)
+    priced = ~np.isnan(prices)
+    long = qty > 0
+    short = qty < 0
+    shares = np.abs(qty)
+    basis = cost * shares
+    market = prices * shares
+    with np.errstate(divide='ignore', invalid='ignore'):
+        pl = np.where(long, market - basis, np.where(short, (cost - prices) * shares, 0.0))
+        pl_pct = np.where(basis != 0, pl / basis * 100, np.where(long, np.nan, 0.0))
+        if prev_closes is None:
+            daily_pct = np.full(len(qty), np.nan)
+        else:
+            prev = np.asarray(prev_closes, dtype=float)
+            move = (prices - prev) / prev * 100
+            daily_pct = np.where(long, move, np.where(short, -move, 0.0))
+            daily_pct[~(prev != 0) | ~priced] = np.nan
+    pl[~priced] = np.nan
+    pl_pct[~priced] = np.nan
+    value = np.where(short, -market, market)
+    return Valuation(
+        price=prices,
+        value=value,
+        pl=pl,
+        pl_pct=pl_pct,
+        daily_pct=daily_pct,
+        long=long,
+        short=short,
+        priced=priced,
+        total_unrealized_pl=float(np.nansum(pl)),
+        total_invested=float(basis[priced & (long | short)].sum()),
+        total_value=float(np.nansum(value)),
+    )
+
+
+# Display helpers shared by the CLI and GUI tables, 'N/A' for missing values
+def fmt_dollars(x):
+    return 'N/A' if np.isnan(x) else f"${x:,.2f}"
+
+
+def fmt_value(x):
+    # Shorts are shown as -$1,234.56
+    if np.isnan(x):
+        return 'N/A'
+    return f"-${-x:,.2f}" if x < 0 else f"${x:,.2f}"
+
+
+def fmt_pct(x, signed=False):
+    if np.isnan(x):
+        return 'N/A'
+    return f"{x:+.2f}%" if signed else f"{x:.2f}%"
+
+
+def position_types(v, long_label='LONG', short_label='SHORT'):
+    # LONG/SHORT per row, blank for flat or unpriced rows
+    return [long_label if v.priced[i] and v.long[i] else short_label if v.priced[i] and v.short[i] else ''
+            for i in range(len(v.priced))]